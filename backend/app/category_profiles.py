@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 
@@ -196,6 +197,9 @@ def _field_label(field: str) -> str:
     return mapping.get(field, field.replace("_", " ").title())
 
 
+# Pure function of the raw feature name, so cache the string munging; None
+# results (suppressed labels) are worth caching too.
+@lru_cache(maxsize=4096)
 def humanize_feature(raw: str) -> str | None:
     parts = raw.split("::")
     if len(parts) < 5 or parts[0] != "cat":
@@ -235,19 +239,40 @@ def humanize_feature(raw: str) -> str | None:
 
 def humanize_feature_list(raw_list: list[tuple[str, float]]) -> list[tuple[str, float]]:
     seen: set[str] = set()
+    seen_add = seen.add
     results: list[tuple[str, float]] = []
     for raw, weight in raw_list:
         label = humanize_feature(raw)
         if not label:
             continue
-        key = label.strip().lower()
+        # Labels come out of humanize_feature already stripped; casefold is the
+        # cheaper (and more correct) case-insensitive dedupe key.
+        key = label.casefold()
         if key in seen:
             continue
-        seen.add(key)
+        seen_add(key)
         results.append((label, weight))
     return results
 
 
+# (field, weight >= 0) -> label; one dict probe replaces the branch chain that
+# ran per surviving feature in the summary loops.
+_NUMERIC_LABELS: dict[tuple[str, bool], str] = {
+    ("price_min", True): "Higher Price Range",
+    ("price_min", False): "Lower Price Range",
+    ("price_max", True): "Higher Price Range",
+    ("price_max", False): "Lower Price Range",
+    ("runtime_minutes", True): "Longer Runtime",
+    ("runtime_minutes", False): "Shorter Runtime",
+    ("release_year", True): "Newer Releases",
+    ("release_year", False): "Older Releases",
+    ("vote_average", True): "Higher Rated Titles",
+    ("vote_average", False): "Lower Rated Titles",
+    ("popularity", True): "Popular Titles",
+    ("popularity", False): "Niche Titles",
+}
+
+
 def numeric_preference_label(raw: str, weight: float) -> str:
     parts = raw.split("::")
     if len(parts) < 4:
@@ -255,14 +280,9 @@ def numeric_preference_label(raw: str, weight: float) -> str:
     field = parts[3].replace("_z", "")
     positive = weight >= 0
 
+    label = _NUMERIC_LABELS.get((field, positive))
+    if label is not None:
+        return label
     if field.startswith("price_"):
         return "Higher Price Range" if positive else "Lower Price Range"
-    if field == "runtime_minutes":
-        return "Longer Runtime" if positive else "Shorter Runtime"
-    if field == "release_year":
-        return "Newer Releases" if positive else "Older Releases"
-    if field == "vote_average":
-        return "Higher Rated Titles" if positive else "Lower Rated Titles"
-    if field == "popularity":
-        return "Popular Titles" if positive else "Niche Titles"
     return f"{field.replace('_', ' ').title()} Preference"
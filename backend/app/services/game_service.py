@@ -1,7 +1,10 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import hashlib
 import random
+import re
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -18,9 +21,13 @@ from ..category_profiles import (
     numeric_preference_label,
     supported_categories,
 )
-from ..ml.prefix_cf import PrefixCFModel
+from ..ml.prefix_cf import PrefixCFModel, decode_state, encode_state
 from ..services.recommender_mongo import recommender_mongo
 
+# Cheap stand-in for ObjectId.is_valid on the string ids we store; ObjectId()
+# would re-run the same check, so validate once with a precompiled match.
+_OBJECT_ID_HEX = re.compile(r"^[0-9a-fA-F]{24}$").match
+
 def humanize_feature(raw: str) -> str | None:
     return profile_humanize_feature(raw)
 
@@ -32,30 +39,51 @@ def humanize_feature_list(raw_list: list[tuple[str, float]]) -> list[tuple[str,
 class GameService:
     """Sequential preference game service (50->10 onboarding, 5-round duel)."""
 
+    # Catalog churn is rare (ingest scripts), so a short TTL keeps repeated
+    # start_round calls from re-decoding the whole collection.
+    _SCORING_CATALOG_TTL_SECONDS = 60.0
+
     def __init__(self):
         self.recommender = recommender_mongo
         self._indexes_ready = False
+        self._index_lock = asyncio.Lock()
+        self._scoring_catalog_cache: dict[str, tuple[float, list[dict[str, Any]]]] = {}
 
     async def _ensure_indexes(self, db: AsyncIOMotorDatabase) -> None:
         if self._indexes_ready:
             return
 
-        await db.games.create_index([("status", 1), ("created_at", -1)])
-        await db.games.create_index([("player_name", 1), ("created_at", -1)])
-        await db.games.create_index([("category", 1), ("status", 1), ("created_at", -1)])
-        await db.games.create_index([("category", 1), ("player_name", 1), ("created_at", -1)])
-        await db.game_rounds.create_index(
-            [("game_id", 1), ("round_number", 1)],
-            unique=True,
-            name="game_id_round_number_unique_v2",
-            partialFilterExpression={"game_id": {"$type": "objectId"}},
-        )
-        await db.game_rounds.create_index([("game_id", 1), ("created_at", -1)])
-        await db.products.create_index([("category", 1), ("source_id", 1)], unique=True)
-        await db.products.create_index([("category", 1), ("title", 1)])
-        await db.products.create_index([("category", 1), ("vendor", 1)])
-        await db.products.create_index([("category", 1), ("release_year", 1)])
-        self._indexes_ready = True
+        # Double-checked under a lock so concurrent cold-start requests don't
+        # each fire the full batch of idempotent (but not free) create_index calls.
+        async with self._index_lock:
+            if self._indexes_ready:
+                return
+
+            await asyncio.gather(
+                db.games.create_index([("status", 1), ("created_at", -1)]),
+                db.games.create_index([("player_name", 1), ("created_at", -1)]),
+                db.games.create_index([("category", 1), ("status", 1), ("created_at", -1)]),
+                db.games.create_index([("category", 1), ("player_name", 1), ("created_at", -1)]),
+                # Partial index keeps the leaderboard entry space to completed
+                # games only, so the sort below is a pure index walk.
+                db.games.create_index(
+                    [("score_difference", -1), ("human_score", -1), ("created_at", 1)],
+                    partialFilterExpression={"status": "completed"},
+                    name="leaderboard_v1",
+                ),
+                db.game_rounds.create_index(
+                    [("game_id", 1), ("round_number", 1)],
+                    unique=True,
+                    name="game_id_round_number_unique_v2",
+                    partialFilterExpression={"game_id": {"$type": "objectId"}},
+                ),
+                db.game_rounds.create_index([("game_id", 1), ("created_at", -1)]),
+                db.products.create_index([("category", 1), ("source_id", 1)], unique=True),
+                db.products.create_index([("category", 1), ("title", 1)]),
+                db.products.create_index([("category", 1), ("vendor", 1)]),
+                db.products.create_index([("category", 1), ("release_year", 1)]),
+            )
+            self._indexes_ready = True
 
     async def _ensure_model(self, db: AsyncIOMotorDatabase) -> PrefixCFModel:
         if self.recommender.feature_space is None or self.recommender.model is None:
@@ -69,7 +97,9 @@ class GameService:
     @staticmethod
     def _rng_for(game_id: str, round_number: int, salt: str) -> random.Random:
         seed_material = f"{game_id}:{round_number}:{salt}".encode("utf-8")
-        seed = int(hashlib.sha256(seed_material).hexdigest()[:16], 16)
+        # The seed only needs determinism, not cryptographic strength, and
+        # blake2s is markedly cheaper than sha256 for these short inputs.
+        seed = int.from_bytes(hashlib.blake2s(seed_material, digest_size=8).digest(), "big")
         return random.Random(seed)
 
     @staticmethod
@@ -92,26 +122,44 @@ class GameService:
         raw_vec = state.get("user_vec")
         changed = False
 
-        if not isinstance(raw_vec, list):
-            vec = [0.0] * expected_dim
-            changed = True
-        else:
-            vec: list[float] = []
-            for value in raw_vec:
-                try:
-                    vec.append(float(value))
-                except (TypeError, ValueError):
-                    vec.append(0.0)
-                    changed = True
-
-            if len(vec) < expected_dim:
-                vec.extend([0.0] * (expected_dim - len(vec)))
-                changed = True
-            elif len(vec) > expected_dim:
-                vec = vec[:expected_dim]
+        if isinstance(raw_vec, np.ndarray):
+            vec = raw_vec.astype(np.float32, copy=False)
+        elif isinstance(raw_vec, list):
+            try:
+                vec = np.asarray(raw_vec, dtype=np.float32)
+            except (TypeError, ValueError):
+                coerced: list[float] = []
+                for value in raw_vec:
+                    try:
+                        coerced.append(float(value))
+                    except (TypeError, ValueError):
+                        coerced.append(0.0)
+                vec = np.asarray(coerced, dtype=np.float32)
                 changed = True
+        else:
+            vec = np.zeros(expected_dim, dtype=np.float32)
+            changed = True
+
+        if vec.size < expected_dim:
+            vec = np.pad(vec, (0, expected_dim - vec.size))
+            changed = True
+        elif vec.size > expected_dim:
+            vec = vec[:expected_dim]
+            changed = True
 
         state["user_vec"] = vec
+
+        history = state.get("history_sum")
+        if isinstance(history, (list, np.ndarray)):
+            history = np.asarray(history, dtype=np.float32)
+            if history.size != expected_dim:
+                if history.size < expected_dim:
+                    history = np.pad(history, (0, expected_dim - history.size))
+                else:
+                    history = history[:expected_dim]
+                changed = True
+            state["history_sum"] = history
+
         return changed
 
     @staticmethod
@@ -168,6 +216,53 @@ class GameService:
             "image_url": image_url,
         }
 
+    _SNAPSHOT_FIELDS = (
+        "category",
+        "vendor",
+        "product_type",
+        "tags",
+        "options",
+        "price_min",
+        "price_max",
+        "release_year",
+        "runtime_minutes",
+        "vote_average",
+        "popularity",
+        "original_language",
+        "certification",
+        "primary_country",
+        "decade_bucket",
+        "runtime_bucket",
+        "genres",
+        "keywords",
+        "production_companies",
+        "directors",
+    )
+
+    def _selection_snapshot(self, product: dict[str, Any]) -> dict[str, Any]:
+        """Feature-bearing copy of a product kept on the game doc, so later
+        rounds can run hidden-preference detection without re-fetching every
+        prior selection."""
+        snapshot: dict[str, Any] = {"_id": str(product["_id"])}
+        for field in self._SNAPSHOT_FIELDS:
+            if field in product:
+                snapshot[field] = product[field]
+        return snapshot
+
+    def _vec(self, product: dict[str, Any]) -> np.ndarray:
+        """Vectorize through the recommender's per-product cache.
+
+        The cache is rebuilt wholesale on recommender.refresh(), so entries can
+        never go stale against the current feature space.
+        """
+        pid = str(product["_id"])
+        vec = self.recommender.item_vectors.get(pid)
+        if vec is None:
+            vec = self.recommender.feature_space.vectorize(product)
+            self.recommender.item_vectors[pid] = vec
+            self.recommender.item_norms[pid] = float(np.linalg.norm(vec))
+        return vec
+
     async def _get_game(self, db: AsyncIOMotorDatabase, game_id: str) -> dict[str, Any]:
         oid = self._to_object_id(game_id, "game ID")
         game = await db.games.find_one({"_id": oid})
@@ -183,7 +278,7 @@ class GameService:
         ids: list[str],
         projection: dict[str, int] | None = None,
     ) -> list[dict[str, Any]]:
-        object_ids = [ObjectId(pid) for pid in ids if ObjectId.is_valid(pid)]
+        object_ids = [ObjectId(pid) for pid in ids if _OBJECT_ID_HEX(pid)]
         if not object_ids:
             return []
         cursor = db.products.find({"_id": {"$in": object_ids}}, projection)
@@ -219,17 +314,71 @@ class GameService:
         state: dict[str, Any],
         selected_ids: list[str],
     ) -> dict[str, float]:
-        products = await self._get_products_by_ids(
-            db,
-            selected_ids,
-            projection={
+        # The running history sum in state makes coherence O(D); only legacy
+        # states without it pay for the product fetch and pairwise path.
+        coherence_score = model.coherence_from_state(state)
+        if coherence_score is None:
+            products = await self._get_products_by_ids(
+                db,
+                selected_ids,
+                projection={
+                    "category": 1,
+                    "vendor": 1,
+                    "product_type": 1,
+                    "tags": 1,
+                    "options": 1,
+                    "price_min": 1,
+                    "price_max": 1,
+                    "release_year": 1,
+                    "runtime_minutes": 1,
+                    "vote_average": 1,
+                    "popularity": 1,
+                    "original_language": 1,
+                    "certification": 1,
+                    "primary_country": 1,
+                    "decade_bucket": 1,
+                    "runtime_bucket": 1,
+                    "genres": 1,
+                    "keywords": 1,
+                    "production_companies": 1,
+                    "directors": 1,
+                },
+            )
+            vectors = [self._vec(product) for product in products]
+            if vectors:
+                coherence_score = model.coherence_score_matrix(np.stack(vectors))
+            else:
+                coherence_score = 0.0
+        predicted_prefix_rating = model.predict_prefix_rating(state)
+        return {
+            "coherence_score": float(coherence_score),
+            "predicted_prefix_rating": float(predicted_prefix_rating),
+        }
+
+    async def _products_for_scoring_only(
+        self,
+        db: AsyncIOMotorDatabase,
+        category: str,
+    ) -> list[dict[str, Any]]:
+        """Catalog scan carrying only the fields the vectorizer consumes.
+
+        start_round ranks thousands of candidates and then hydrates the chosen
+        ten separately, so shipping display fields here is wasted BSON decode.
+        """
+        cached = self._scoring_catalog_cache.get(category)
+        if cached is not None and time.monotonic() - cached[0] < self._SCORING_CATALOG_TTL_SECONDS:
+            return cached[1]
+
+        cursor = db.products.find(
+            self._category_product_filter(category),
+            {
                 "category": 1,
                 "vendor": 1,
-                "product_type": 1,
-                "tags": 1,
-                "options": 1,
                 "price_min": 1,
                 "price_max": 1,
+                "tags": 1,
+                "product_type": 1,
+                "options": 1,
                 "release_year": 1,
                 "runtime_minutes": 1,
                 "vote_average": 1,
@@ -245,13 +394,9 @@ class GameService:
                 "directors": 1,
             },
         )
-        vectors = [self.recommender.feature_space.vectorize(p) for p in products]
-        coherence_score = model.coherence_score(vectors)
-        predicted_prefix_rating = model.predict_prefix_rating(state)
-        return {
-            "coherence_score": float(coherence_score),
-            "predicted_prefix_rating": float(predicted_prefix_rating),
-        }
+        products = await cursor.to_list(length=None)
+        self._scoring_catalog_cache[category] = (time.monotonic(), products)
+        return products
 
     async def _all_products_for_scoring(
         self,
@@ -301,26 +446,29 @@ class GameService:
         products = list(all_products)
         rng.shuffle(products)
 
+        def field_values(field: str) -> np.ndarray:
+            return np.fromiter(
+                (float(p.get(field) or 0.0) for p in products),
+                dtype=np.float32,
+                count=len(products),
+            )
+
         numeric_field = "price_min" if category == "fountain_pens" else "popularity"
-        values = [float(p.get(numeric_field) or 0.0) for p in products]
-        if max(values, default=0.0) == 0.0 and category == "movies":
+        values = field_values(numeric_field)
+        if category == "movies" and float(np.max(values, initial=0.0)) == 0.0:
             numeric_field = "release_year"
-            values = [float(p.get(numeric_field) or 0.0) for p in products]
-        sorted_values = sorted(values)
-        q1 = sorted_values[len(sorted_values) // 3]
-        q2 = sorted_values[(2 * len(sorted_values)) // 3]
-
-        low: list[dict[str, Any]] = []
-        mid: list[dict[str, Any]] = []
-        high: list[dict[str, Any]] = []
-        for p in products:
-            value = float(p.get(numeric_field) or 0.0)
-            if value <= q1:
-                low.append(p)
-            elif value <= q2:
-                mid.append(p)
-            else:
-                high.append(p)
+            values = field_values(numeric_field)
+
+        # Tertile cutoffs via partial selection instead of a full sort.
+        cut1 = len(values) // 3
+        cut2 = (2 * len(values)) // 3
+        partitioned = np.partition(values, (cut1, cut2))
+        q1 = float(partitioned[cut1])
+        q2 = float(partitioned[cut2])
+
+        low = [products[i] for i in np.flatnonzero(values <= q1)]
+        mid = [products[i] for i in np.flatnonzero((values > q1) & (values <= q2))]
+        high = [products[i] for i in np.flatnonzero(values > q2)]
 
         def round_robin_pick(bucket: list[dict[str, Any]], target: int) -> list[dict[str, Any]]:
             by_vendor: dict[str, list[dict[str, Any]]] = {}
@@ -364,42 +512,39 @@ class GameService:
         state: dict[str, Any],
         products: list[dict[str, Any]],
     ) -> list[tuple[float, dict[str, Any]]]:
-        # Hot path: score thousands of items per movie round.
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
-        feature_dim = len(model.feature_space.feature_index)
-        if user_vec.size < feature_dim:
-            user_vec = np.pad(user_vec, (0, feature_dim - user_vec.size))
-        elif user_vec.size > feature_dim:
-            user_vec = user_vec[:feature_dim]
-        user_norm = float(np.linalg.norm(user_vec))
-        bias = float(state.get("bias", 0.0))
-        item_vectors = self.recommender.item_vectors
-        item_norms = self.recommender.item_norms
-
-        scored: list[tuple[float, dict[str, Any]]] = []
-        for product in products:
-            pid = str(product["_id"])
-            vec = item_vectors.get(pid)
-            if vec is None:
-                vec = self.recommender.feature_space.vectorize(product)
-                item_vectors[pid] = vec
-                item_norms[pid] = float(np.linalg.norm(vec))
-
-            if user_norm <= 0:
-                similarity = 0.0
-            else:
-                item_norm = item_norms.get(pid)
-                if item_norm is None:
-                    item_norm = float(np.linalg.norm(vec))
-                    item_norms[pid] = item_norm
-                denom = user_norm * item_norm
-                similarity = float(np.dot(user_vec, vec) / denom) if denom > 0 else 0.0
-
-            score = 3.0 + 1.7 * similarity + bias
-            score = float(min(5.0, max(1.0, score)))
-            scored.append((float(score), product))
-        scored.sort(key=lambda item: (item[0], str(item[1]["_id"])), reverse=True)
-        return scored
+        # Hot path: score thousands of items per movie round. Stack candidate
+        # vectors into one matrix so scoring is a single GEMV instead of a
+        # Python loop of per-item dot products.
+        if not products:
+            return []
+
+        id_to_row = self.recommender._id_to_row
+        item_matrix = self.recommender._item_matrix
+        pids = [str(product["_id"]) for product in products]
+        rows = np.array([id_to_row.get(pid, -1) for pid in pids], dtype=np.intp)
+        hits = rows >= 0
+        if item_matrix.size and bool(hits.all()):
+            # Gather the candidate rows straight out of the cached catalog
+            # matrix — one C-level take, no per-item dict lookups or stacking.
+            matrix = item_matrix[rows]
+        else:
+            dim = (
+                item_matrix.shape[1]
+                if item_matrix.size
+                else len(self.recommender.feature_space.feature_index)
+            )
+            matrix = np.zeros((len(products), dim), dtype=np.float32)
+            if item_matrix.size:
+                matrix[hits] = item_matrix[rows[hits]]
+            miss_positions = np.flatnonzero(~hits)
+            if miss_positions.size:
+                matrix[miss_positions] = self.recommender.feature_space.vectorize_batch(
+                    products[i] for i in miss_positions
+                )
+
+        scores = model.score_batch(state, matrix)
+        order = np.lexsort((np.array(pids), scores))[::-1]
+        return [(float(scores[i]), products[i]) for i in order]
 
     def _build_round_candidates(
         self,
@@ -511,20 +656,21 @@ class GameService:
         if not clean_name:
             raise ValueError("Player name is required")
 
+        now = datetime.utcnow()
         user_doc = {
             "name": f"{clean_name} (game)",
             "sessions": [],
-            "created_at": datetime.utcnow(),
+            "created_at": now,
         }
         user_result = await db.users.insert_one(user_doc)
         user_id = str(user_result.inserted_id)
 
         session_doc = {
             "user_id": user_id,
-            "state": model.init_state(),
+            "state": encode_state(model.init_state()),
             "selections": [],
             "prefix_ratings": [],
-            "created_at": datetime.utcnow(),
+            "created_at": now,
         }
         session_result = await db.sessions.insert_one(session_doc)
         learning_session_id = str(session_result.inserted_id)
@@ -534,7 +680,6 @@ class GameService:
             {"$push": {"sessions": learning_session_id}},
         )
 
-        now = datetime.utcnow()
         game_doc = {
             "schema_version": 2,
             "player_name": clean_name,
@@ -544,9 +689,10 @@ class GameService:
             "total_rounds": total_rounds,
             "human_score": 0,
             "ai_score": 0,
+            "score_difference": 0,
             "learning_user_id": user_id,
             "learning_session_id": learning_session_id,
-            "model_state": model.init_state(),
+            "model_state": encode_state(model.init_state()),
             "onboarding_pool_ids": [],
             "onboarding_selected_ids": [],
             "onboarding_rating": None,
@@ -555,18 +701,17 @@ class GameService:
         }
 
         result = await db.games.insert_one(game_doc)
-        game = await db.games.find_one({"_id": result.inserted_id})
-        assert game is not None
+        game_doc["_id"] = result.inserted_id
 
         return {
-            "id": str(game["_id"]),
-            "player_name": game["player_name"],
+            "id": str(game_doc["_id"]),
+            "player_name": game_doc["player_name"],
             "category": normalized_category,
-            "status": game["status"],
-            "total_rounds": game["total_rounds"],
-            "human_score": game["human_score"],
-            "ai_score": game["ai_score"],
-            "created_at": game["created_at"],
+            "status": game_doc["status"],
+            "total_rounds": game_doc["total_rounds"],
+            "human_score": game_doc["human_score"],
+            "ai_score": game_doc["ai_score"],
+            "created_at": game_doc["created_at"],
         }
 
     async def get_onboarding(self, db: AsyncIOMotorDatabase, game_id: str) -> dict[str, Any]:
@@ -576,38 +721,60 @@ class GameService:
             raise ValueError("Game is already completed")
 
         pool_ids = game.get("onboarding_pool_ids") or []
+        cards = game.get("onboarding_pool_cards") or []
         if not pool_ids:
             all_products = await self._all_products_for_scoring(db, category)
             pool_ids = self._diverse_onboarding_sample(all_products, game_id, category)
+            # Build cards from the catalog we already hold in memory; the
+            # scoring projection omits images, so fetch just those for the 50.
+            pool_set = set(pool_ids)
+            by_id = {str(p["_id"]): p for p in all_products if str(p["_id"]) in pool_set}
+            image_rows = await db.products.find(
+                {"_id": {"$in": [ObjectId(pid) for pid in pool_ids]}},
+                {"images": 1},
+            ).to_list(length=len(pool_ids))
+            for row in image_rows:
+                product = by_id.get(str(row["_id"]))
+                if product is not None:
+                    product["images"] = row.get("images") or []
+            cards = [self._product_card(by_id[pid], category) for pid in pool_ids if pid in by_id]
             await db.games.update_one(
                 {"_id": game["_id"]},
-                {"$set": {"onboarding_pool_ids": pool_ids, "updated_at": datetime.utcnow()}},
+                {
+                    "$set": {
+                        "onboarding_pool_ids": pool_ids,
+                        "onboarding_pool_cards": cards,
+                        "updated_at": datetime.utcnow(),
+                    }
+                },
             )
-
-        products = await self._get_products_by_ids(
-            db,
-            pool_ids,
-            projection={
-                "title": 1,
-                "category": 1,
-                "vendor": 1,
-                "price_min": 1,
-                "price_max": 1,
-                "tags": 1,
-                "images": 1,
-                "release_year": 1,
-                "runtime_minutes": 1,
-                "vote_average": 1,
-                "directors": 1,
-            },
-        )
+        elif not cards:
+            # Games created before cards were cached on the doc.
+            products = await self._get_products_by_ids(
+                db,
+                pool_ids,
+                projection={
+                    "title": 1,
+                    "category": 1,
+                    "vendor": 1,
+                    "price_min": 1,
+                    "price_max": 1,
+                    "tags": 1,
+                    "images": 1,
+                    "release_year": 1,
+                    "runtime_minutes": 1,
+                    "vote_average": 1,
+                    "directors": 1,
+                },
+            )
+            cards = [self._product_card(p, category) for p in products]
 
         return {
             "game_id": game_id,
             "category": category,
             "category_copy": category_copy(category),
-            "pool_size": len(products),
-            "products": [self._product_card(p, category) for p in products],
+            "pool_size": len(cards),
+            "products": cards,
         }
 
     async def submit_onboarding(
@@ -666,7 +833,7 @@ class GameService:
         if len(selected_products) != 10:
             raise ValueError("One or more selected products were not found")
 
-        state = game.get("model_state") or model.init_state()
+        state = decode_state(game.get("model_state") or model.init_state())
         self._align_state_to_feature_space(model, state)
         for product in selected_products:
             model.update_with_selection(state, product, is_exception=False)
@@ -674,39 +841,64 @@ class GameService:
 
         metrics = await self._metrics_for_state(db, model, state, selected_product_ids)
 
-        base_time = datetime.utcnow()
-        for index, product_id in enumerate(selected_product_ids):
-            stamp = base_time + timedelta(milliseconds=index)
-            await self._persist_learning_selection(db, game, product_id, stamp)
+        now = datetime.utcnow()
 
-        prefix_rating_doc = {
-            "session_id": game["learning_session_id"],
-            "rating": int(rating),
-            "tags": [],
-            "created_at": base_time + timedelta(milliseconds=1000),
-        }
-        rating_inserted = await db.prefix_ratings.insert_one(prefix_rating_doc)
-        await db.sessions.update_one(
-            {"_id": ObjectId(game["learning_session_id"])},
+        # Conditional write instead of trusting the earlier read: concurrent
+        # retries race past the in-memory check, but only one can match here.
+        # The claim comes before the selection/rating/session writes so a
+        # losing retry raises without polluting the learning session.
+        result = await db.games.update_one(
             {
-                "$set": {"state": state},
-                "$push": {"prefix_ratings": str(rating_inserted.inserted_id)},
+                "_id": game["_id"],
+                "$or": [
+                    {"onboarding_selected_ids": {"$size": 0}},
+                    {"onboarding_selected_ids": {"$exists": False}},
+                ],
             },
-        )
-
-        await db.games.update_one(
-            {"_id": game["_id"]},
             {
                 "$set": {
                     "status": "ready",
                     "category": category,
-                    "model_state": state,
+                    "model_state": encode_state(state),
+                    "selection_snapshots": [self._selection_snapshot(p) for p in selected_products],
                     "onboarding_selected_ids": selected_product_ids,
                     "onboarding_rating": int(rating),
-                    "updated_at": datetime.utcnow(),
+                    "updated_at": now,
                 }
             },
         )
+        if result.matched_count == 0:
+            raise ValueError("Onboarding already submitted for this game")
+
+        # One insert_many + one $push-$each instead of 10 insert_one/$push pairs.
+        selection_docs = [
+            {
+                "session_id": game["learning_session_id"],
+                "product_id": product_id,
+                "is_exception": False,
+                "created_at": now + timedelta(milliseconds=index),
+            }
+            for index, product_id in enumerate(selected_product_ids)
+        ]
+        selections_inserted = await db.selections.insert_many(selection_docs)
+
+        prefix_rating_doc = {
+            "session_id": game["learning_session_id"],
+            "rating": int(rating),
+            "tags": [],
+            "created_at": now + timedelta(milliseconds=1000),
+        }
+        rating_inserted = await db.prefix_ratings.insert_one(prefix_rating_doc)
+        await db.sessions.update_one(
+            {"_id": ObjectId(game["learning_session_id"])},
+            {
+                "$set": {"state": encode_state(state)},
+                "$push": {
+                    "selections": {"$each": [str(oid) for oid in selections_inserted.inserted_ids]},
+                    "prefix_ratings": str(rating_inserted.inserted_id),
+                },
+            },
+        )
 
         return {
             "accepted": True,
@@ -731,23 +923,25 @@ class GameService:
         )
 
         if existing and not existing.get("completed", False):
-            products = await self._get_products_by_ids(
-                db,
-                existing.get("candidate_ids", []),
-                projection={
-                    "title": 1,
-                    "category": 1,
-                    "vendor": 1,
-                    "price_min": 1,
-                    "price_max": 1,
-                    "tags": 1,
-                    "images": 1,
-                    "release_year": 1,
-                    "runtime_minutes": 1,
-                    "vote_average": 1,
-                    "directors": 1,
-                },
-            )
+            products = existing.get("candidate_docs")
+            if not products:
+                products = await self._get_products_by_ids(
+                    db,
+                    existing.get("candidate_ids", []),
+                    projection={
+                        "title": 1,
+                        "category": 1,
+                        "vendor": 1,
+                        "price_min": 1,
+                        "price_max": 1,
+                        "tags": 1,
+                        "images": 1,
+                        "release_year": 1,
+                        "runtime_minutes": 1,
+                        "vote_average": 1,
+                        "directors": 1,
+                    },
+                )
             return {
                 "round_number": round_number,
                 "category": category,
@@ -756,22 +950,28 @@ class GameService:
                 "pre_round_metrics": existing.get("pre_metrics", {"coherence_score": 0.0, "predicted_prefix_rating": 3.0}),
             }
 
-        state = game.get("model_state") or model.init_state()
+        now = datetime.utcnow()
+        state = decode_state(game.get("model_state") or model.init_state())
         if self._align_state_to_feature_space(model, state):
             await db.games.update_one(
                 {"_id": game["_id"]},
-                {"$set": {"model_state": state, "updated_at": datetime.utcnow()}},
+                {"$set": {"model_state": encode_state(state), "updated_at": now}},
             )
-        selected_ids = await self._current_selection_sequence(db, game)
+        selected_ids, all_products = await asyncio.gather(
+            self._current_selection_sequence(db, game),
+            self._products_for_scoring_only(db, category),
+        )
         used = set(selected_ids)
-
-        all_products = await self._all_products_for_scoring(db, category)
         candidates_source = [p for p in all_products if str(p["_id"]) not in used]
         if len(candidates_source) < 10:
             raise ValueError("Not enough products left to generate a round")
 
-        scored = self._rank_candidates(model, state, candidates_source)
+        # Ranking the whole catalog is CPU-bound (vectorize misses + BLAS GEMV);
+        # run it off the event loop so other requests keep being serviced.
+        scored = await asyncio.to_thread(self._rank_candidates, model, state, candidates_source)
         candidate_ids = self._build_round_candidates(game_id, round_number, scored)
+        # Hydrate with the full pick projection and sidecar the docs on the
+        # round, so submit_pick can score and explain without re-fetching.
         candidate_products = await self._get_products_by_ids(
             db,
             candidate_ids,
@@ -783,9 +983,20 @@ class GameService:
                 "price_max": 1,
                 "tags": 1,
                 "images": 1,
+                "product_type": 1,
+                "options": 1,
                 "release_year": 1,
                 "runtime_minutes": 1,
                 "vote_average": 1,
+                "popularity": 1,
+                "original_language": 1,
+                "certification": 1,
+                "primary_country": 1,
+                "decade_bucket": 1,
+                "runtime_bucket": 1,
+                "genres": 1,
+                "keywords": 1,
+                "production_companies": 1,
                 "directors": 1,
             },
         )
@@ -798,9 +1009,10 @@ class GameService:
             "game_id": game["_id"],
             "round_number": round_number,
             "candidate_ids": candidate_ids,
+            "candidate_docs": candidate_products,
             "pre_metrics": pre_metrics,
             "completed": False,
-            "created_at": datetime.utcnow(),
+            "created_at": now,
         }
         await db.game_rounds.update_one(
             {"game_id": game["_id"], "round_number": round_number},
@@ -810,7 +1022,7 @@ class GameService:
 
         await db.games.update_one(
             {"_id": game["_id"]},
-            {"$set": {"status": "playing", "updated_at": datetime.utcnow()}},
+            {"$set": {"status": "playing", "updated_at": now}},
         )
 
         return {
@@ -852,68 +1064,52 @@ class GameService:
         if product_id not in candidate_ids:
             raise ValueError("Selected product is not in this round's candidate set")
 
-        candidate_products = await self._get_products_by_ids(
-            db,
-            candidate_ids,
-            projection={
-                "title": 1,
-                "category": 1,
-                "vendor": 1,
-                "price_min": 1,
-                "price_max": 1,
-                "tags": 1,
-                "images": 1,
-                "product_type": 1,
-                "options": 1,
-                "release_year": 1,
-                "runtime_minutes": 1,
-                "vote_average": 1,
-                "popularity": 1,
-                "original_language": 1,
-                "certification": 1,
-                "primary_country": 1,
-                "decade_bucket": 1,
-                "runtime_bucket": 1,
-                "genres": 1,
-                "keywords": 1,
-                "production_companies": 1,
-                "directors": 1,
-            },
-        )
+        # start_round sidecars the hydrated candidate docs on the round, so
+        # picks normally need no product fetch; overlap the legacy fallback
+        # with the pick-history read when one is required.
+        candidate_docs = round_doc.get("candidate_docs")
+        if candidate_docs:
+            candidate_products = candidate_docs
+            picked_ids = await self._completed_pick_ids(db, game_id)
+        else:
+            candidate_products, picked_ids = await asyncio.gather(
+                self._get_products_by_ids(
+                    db,
+                    candidate_ids,
+                    projection={
+                        "title": 1,
+                        "category": 1,
+                        "vendor": 1,
+                        "price_min": 1,
+                        "price_max": 1,
+                        "tags": 1,
+                        "images": 1,
+                        "product_type": 1,
+                        "options": 1,
+                        "release_year": 1,
+                        "runtime_minutes": 1,
+                        "vote_average": 1,
+                        "popularity": 1,
+                        "original_language": 1,
+                        "certification": 1,
+                        "primary_country": 1,
+                        "decade_bucket": 1,
+                        "runtime_bucket": 1,
+                        "genres": 1,
+                        "keywords": 1,
+                        "production_companies": 1,
+                        "directors": 1,
+                    },
+                ),
+                self._completed_pick_ids(db, game_id),
+            )
         by_id = {str(p["_id"]): p for p in candidate_products}
         if product_id not in by_id:
             raise ValueError("Selected product does not exist")
 
-        state = game.get("model_state") or model.init_state()
+        state = decode_state(game.get("model_state") or model.init_state())
         self._align_state_to_feature_space(model, state)
-        item_vectors = self.recommender.item_vectors
-        item_norms = self.recommender.item_norms
-        user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
-        user_norm = float(np.linalg.norm(user_vec))
-        bias = float(state.get("bias", 0.0))
-        scored = []
-        for item in candidate_products:
-            pid = str(item["_id"])
-            vec = item_vectors.get(pid)
-            if vec is None:
-                vec = self.recommender.feature_space.vectorize(item)
-                item_vectors[pid] = vec
-                item_norms[pid] = float(np.linalg.norm(vec))
-
-            if user_norm <= 0:
-                similarity = 0.0
-            else:
-                item_norm = item_norms.get(pid)
-                if item_norm is None:
-                    item_norm = float(np.linalg.norm(vec))
-                    item_norms[pid] = item_norm
-                denom = user_norm * item_norm
-                similarity = float(np.dot(user_vec, vec) / denom) if denom > 0 else 0.0
-
-            score = 3.0 + 1.7 * similarity + bias
-            score = float(min(5.0, max(1.0, score)))
-            scored.append((float(score), item))
-        scored.sort(key=lambda item: (item[0], str(item[1]["_id"])), reverse=True)
+        scored = self._rank_candidates(model, state, candidate_products)
 
         ai_score, ai_pick_product = scored[0]
         ai_pick_id = str(ai_pick_product["_id"])
@@ -930,13 +1126,27 @@ class GameService:
         human_pick_product = by_id[product_id]
         model.update_with_selection(state, human_pick_product, is_exception=False)
 
-        await self._persist_learning_selection(db, game, product_id)
-        await db.sessions.update_one(
-            {"_id": ObjectId(game["learning_session_id"])},
-            {"$set": {"state": state}},
-        )
+        now = datetime.utcnow()
+        session_id = game.get("learning_session_id")
+        if session_id:
+            # Inline the learning-selection persist so the $push and the state
+            # $set share one sessions.update_one instead of two round-trips.
+            selection_doc = {
+                "session_id": session_id,
+                "product_id": product_id,
+                "is_exception": False,
+                "created_at": now,
+            }
+            inserted = await db.selections.insert_one(selection_doc)
+            await db.sessions.update_one(
+                {"_id": ObjectId(session_id)},
+                {
+                    "$set": {"state": encode_state(state)},
+                    "$push": {"selections": str(inserted.inserted_id)},
+                },
+            )
 
-        selected_ids = await self._current_selection_sequence(db, game, include_product_id=product_id)
+        selected_ids = list(game.get("onboarding_selected_ids", [])) + picked_ids + [product_id]
         post_metrics = await self._metrics_for_state(db, model, state, selected_ids)
 
         top_candidates = []
@@ -946,62 +1156,77 @@ class GameService:
             top_candidates.append(card)
 
         # Build feature-level explanation
-        human_vec = self.recommender.feature_space.vectorize(human_pick_product)
-        ai_vec = self.recommender.feature_space.vectorize(ai_pick_product)
+        human_vec = self._vec(human_pick_product)
+        ai_vec = self._vec(ai_pick_product)
         user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
 
         # Identify what features the user profile has learned to prefer
-        inv_index = {v: k for k, v in self.recommender.feature_space.feature_index.items()}
+        inv_index = self.recommender.feature_space.inv_index
+        # Walk only the significant dimensions (usually <200 of thousands),
+        # pre-sorted by magnitude so no Python-side sort is needed after.
+        significant = np.flatnonzero(np.abs(user_vec) > 0.05)
+        significant = significant[np.argsort(-np.abs(user_vec[significant]), kind="stable")]
         feature_weights = []
-        for idx in range(len(user_vec)):
+        for idx in significant:
             w = float(user_vec[idx])
-            if abs(w) > 0.05:
-                fname = inv_index.get(idx, f"feature_{idx}")
-                if "::num::" in fname:
-                    feature_weights.append((numeric_preference_label(fname, w), abs(w)))
-                else:
-                    feature_weights.append((fname, w))
-        feature_weights.sort(key=lambda x: abs(x[1]), reverse=True)
+            fname = inv_index[idx]
+            if "::num::" in fname:
+                feature_weights.append((numeric_preference_label(fname, w), abs(w)))
+            else:
+                feature_weights.append((fname, w))
         top_positive = humanize_feature_list([(n, round(w, 3)) for n, w in feature_weights if w > 0][:8])
         top_negative = humanize_feature_list([(n, round(w, 3)) for n, w in feature_weights if w < 0][:5])
 
-        # Human pick features
-        human_features = [inv_index.get(i, f"f{i}") for i in range(len(human_vec)) if human_vec[i] > 0]
-        ai_features = [inv_index.get(i, f"f{i}") for i in range(len(ai_vec)) if ai_vec[i] > 0]
-        shared_raw = list(set(human_features) & set(ai_features))
-        shared_features = [h for h in (humanize_feature(f) for f in shared_raw) if h is not None]
+        # Features shared between the human and AI picks
+        shared_idx = np.intersect1d(
+            np.flatnonzero(human_vec > 0), np.flatnonzero(ai_vec > 0), assume_unique=True
+        )
+        shared_features = [
+            h for h in (humanize_feature(inv_index[i]) for i in shared_idx) if h is not None
+        ]
 
         # ── Hidden preference detection ──────────────────────────
-        all_selected_ids = await self._current_selection_sequence(
-            db, game, include_product_id=product_id
+        # Prior selections are snapshotted on the game doc; only legacy games
+        # without snapshots fall back to the $in fetch.
+        all_selected_ids = selected_ids
+        snapshots = game.get("selection_snapshots") or []
+        if len(snapshots) == len(all_selected_ids) - 1:
+            all_selected_products = list(snapshots) + [human_pick_product]
+        else:
+            all_selected_products = await self._get_products_by_ids(
+                db,
+                all_selected_ids,
+                projection={
+                    "category": 1,
+                    "vendor": 1,
+                    "product_type": 1,
+                    "tags": 1,
+                    "options": 1,
+                    "price_min": 1,
+                    "price_max": 1,
+                    "release_year": 1,
+                    "runtime_minutes": 1,
+                    "vote_average": 1,
+                    "popularity": 1,
+                    "original_language": 1,
+                    "certification": 1,
+                    "primary_country": 1,
+                    "decade_bucket": 1,
+                    "runtime_bucket": 1,
+                    "genres": 1,
+                    "keywords": 1,
+                    "production_companies": 1,
+                    "directors": 1,
+                },
+            )
+        selected_matrix = (
+            np.stack([self._vec(p) for p in all_selected_products])
+            if all_selected_products
+            else None
         )
-        all_selected_products = await self._get_products_by_ids(
-            db,
-            all_selected_ids,
-            projection={
-                "category": 1,
-                "vendor": 1,
-                "product_type": 1,
-                "tags": 1,
-                "options": 1,
-                "price_min": 1,
-                "price_max": 1,
-                "release_year": 1,
-                "runtime_minutes": 1,
-                "vote_average": 1,
-                "popularity": 1,
-                "original_language": 1,
-                "certification": 1,
-                "primary_country": 1,
-                "decade_bucket": 1,
-                "runtime_bucket": 1,
-                "genres": 1,
-                "keywords": 1,
-                "production_companies": 1,
-                "directors": 1,
-            },
+        hidden_raw = model.detect_hidden_preferences(
+            state, all_selected_products, selected_matrix=selected_matrix
         )
-        hidden_raw = model.detect_hidden_preferences(state, all_selected_products)
         hidden_prefs = humanize_feature_list(
             [(h["feature"], round(h["latency"], 3)) for h in hidden_raw]
         )
@@ -1034,47 +1259,52 @@ class GameService:
                 f"which scored {ai_score:.2f} based on feature similarity to your profile."
             )
 
-        await db.game_rounds.update_one(
-            {"_id": round_doc["_id"]},
-            {
-                "$set": {
-                    "schema_version": 2,
-                    "human_pick_id": product_id,
-                    "ai_pick_id": ai_pick_id,
-                    "ai_confidence": float(ai_score),
-                    "ai_top_k": [
-                        {"product_id": str(product["_id"]), "score": float(score)}
-                        for score, product in scored[:5]
-                    ],
-                    "ai_top3_ids": ai_top3_ids,
-                    "ai_rank_of_pick": ai_rank_of_pick,
-                    "ai_correct": ai_correct,
-                    "human_points": human_points,
-                    "ai_points": ai_points,
-                    "post_metrics": post_metrics,
-                    "completed": True,
-                    "completed_at": datetime.utcnow(),
-                }
-            },
-        )
-
         new_current_round = game["current_round"] + 1
         new_human_total = game["human_score"] + human_points
         new_ai_total = game["ai_score"] + ai_points
         game_complete = new_current_round >= game["total_rounds"]
 
-        await db.games.update_one(
-            {"_id": game["_id"]},
-            {
-                "$set": {
-                    "current_round": new_current_round,
-                    "human_score": new_human_total,
-                    "ai_score": new_ai_total,
-                    "status": "completed" if game_complete else "playing",
-                    "model_state": state,
-                    "updated_at": datetime.utcnow(),
-                }
-            },
+        # The round result and the game totals live in different collections;
+        # issue both finalizing writes concurrently instead of back to back.
+        await asyncio.gather(
+            db.game_rounds.update_one(
+                {"_id": round_doc["_id"]},
+                {
+                    "$set": {
+                        "schema_version": 2,
+                        "human_pick_id": product_id,
+                        "ai_pick_id": ai_pick_id,
+                        "ai_confidence": float(ai_score),
+                        "ai_top_k": [
+                            {"product_id": str(product["_id"]), "score": float(score)}
+                            for score, product in scored[:5]
+                        ],
+                        "ai_top3_ids": ai_top3_ids,
+                        "ai_rank_of_pick": ai_rank_of_pick,
+                        "ai_correct": ai_correct,
+                        "human_points": human_points,
+                        "ai_points": ai_points,
+                        "post_metrics": post_metrics,
+                        "completed": True,
+                        "completed_at": now,
+                    }
+                },
+            ),
+            db.games.update_one(
+                {"_id": game["_id"]},
+                {
+                    "$set": {
+                        "current_round": new_current_round,
+                        "human_score": new_human_total,
+                        "ai_score": new_ai_total,
+                        "score_difference": new_human_total - new_ai_total,
+                        "status": "completed" if game_complete else "playing",
+                        "model_state": encode_state(state),
+                        "selection_snapshots": [self._selection_snapshot(p) for p in all_selected_products],
+                        "updated_at": now,
+                    }
+                },
+            ),
         )
 
         return {
@@ -1121,59 +1351,70 @@ class GameService:
         if game.get("status") != "completed":
             raise ValueError("Game is not yet completed")
 
-        # Load all rounds
-        cursor = db.game_rounds.find(
-            {"game_id": game["_id"], "completed": True}
-        ).sort("round_number", 1)
-        rounds = await cursor.to_list(length=None)
+        # Rounds and the scoring catalog have no data dependency on each
+        # other — overlap the round-trips.
+        rounds, all_products = await asyncio.gather(
+            db.game_rounds.find(
+                {"game_id": game["_id"], "completed": True}
+            ).sort("round_number", 1).to_list(length=None),
+            self._all_products_for_scoring(db, category),
+        )
+        # The rounds already carry the pick sequence, so the selection history
+        # needs no extra query.
+        all_selected_ids = list(game.get("onboarding_selected_ids", [])) + [
+            rnd["human_pick_id"] for rnd in rounds if rnd.get("human_pick_id")
+        ]
 
-        # Round-by-round data for charts
+        # Round-by-round data for charts; running totals via one cumsum pair
+        # instead of Python accumulators.
+        cum_ai = np.cumsum(
+            np.fromiter((rnd.get("ai_points", 0) for rnd in rounds), dtype=np.int32, count=len(rounds))
+        )
+        cum_human = np.cumsum(
+            np.fromiter((rnd.get("human_points", 0) for rnd in rounds), dtype=np.int32, count=len(rounds))
+        )
         round_stats = []
-        cumulative_ai = 0
-        cumulative_human = 0
-        for rnd in rounds:
-            ai_correct = rnd.get("ai_correct", False)
-            cumulative_ai += rnd.get("ai_points", 0)
-            cumulative_human += rnd.get("human_points", 0)
+        for i, rnd in enumerate(rounds):
             post = rnd.get("post_metrics", {})
             round_stats.append({
                 "round_number": rnd["round_number"],
-                "ai_correct": ai_correct,
+                "ai_correct": rnd.get("ai_correct", False),
                 "ai_rank_of_pick": rnd.get("ai_rank_of_pick", None),
                 "ai_confidence": rnd.get("ai_confidence", 0),
                 "coherence": post.get("coherence_score", 0),
                 "predicted_rating": post.get("predicted_prefix_rating", 3.0),
-                "cumulative_ai": cumulative_ai,
-                "cumulative_human": cumulative_human,
+                "cumulative_ai": int(cum_ai[i]),
+                "cumulative_human": int(cum_human[i]),
             })
 
         # Model's learned preferences from the final state
-        state = game.get("model_state") or model.init_state()
+        state = decode_state(game.get("model_state") or model.init_state())
         if self._align_state_to_feature_space(model, state):
             await db.games.update_one(
                 {"_id": game["_id"]},
-                {"$set": {"model_state": state, "updated_at": datetime.utcnow()}},
+                {"$set": {"model_state": encode_state(state), "updated_at": datetime.utcnow()}},
             )
         user_vec = np.array(state.get("user_vec", []), dtype=np.float32)
-        inv_index = {v: k for k, v in self.recommender.feature_space.feature_index.items()}
+        inv_index = self.recommender.feature_space.inv_index
 
+        # Walk only the significant dimensions (usually <200 of thousands),
+        # pre-sorted by magnitude so no Python-side sort is needed after.
+        significant = np.flatnonzero(np.abs(user_vec) > 0.05)
+        significant = significant[np.argsort(-np.abs(user_vec[significant]), kind="stable")]
         feature_weights = []
-        for idx in range(len(user_vec)):
+        for idx in significant:
             w = float(user_vec[idx])
-            if abs(w) > 0.05:
-                fname = inv_index.get(idx, f"feature_{idx}")
-                if "::num::" in fname:
-                    feature_weights.append((numeric_preference_label(fname, w), abs(w)))
-                else:
-                    feature_weights.append((fname, w))
-        feature_weights.sort(key=lambda x: abs(x[1]), reverse=True)
+            fname = inv_index[idx]
+            if "::num::" in fname:
+                feature_weights.append((numeric_preference_label(fname, w), abs(w)))
+            else:
+                feature_weights.append((fname, w))
 
         learned_likes = humanize_feature_list([(n, round(w, 3)) for n, w in feature_weights if w > 0][:10])
         learned_dislikes = humanize_feature_list([(n, round(w, 3)) for n, w in feature_weights if w < 0][:5])
 
         # Top-5 recommended products from the full catalog
-        all_products = await self._all_products_for_scoring(db, category)
-        scored = self._rank_candidates(model, state, all_products)
+        scored = await asyncio.to_thread(self._rank_candidates, model, state, all_products)
         top5_recs = []
         for score, product in scored[:5]:
             card = self._product_card(product, category)
@@ -1182,7 +1423,6 @@ class GameService:
         top5_ids = {r["id"] for r in top5_recs}
 
         # ── Hidden preference discovery (final) ─────────────────
-        all_selected_ids = await self._current_selection_sequence(db, game)
         all_selected_products = await self._get_products_by_ids(
             db,
             all_selected_ids,
@@ -1209,7 +1449,14 @@ class GameService:
                 "directors": 1,
             },
         )
-        hidden_raw = model.detect_hidden_preferences(state, all_selected_products)
+        selected_matrix = (
+            np.stack([self._vec(p) for p in all_selected_products])
+            if all_selected_products
+            else None
+        )
+        hidden_raw = model.detect_hidden_preferences(
+            state, all_selected_products, selected_matrix=selected_matrix
+        )
         hidden_prefs = humanize_feature_list(
             [(h["feature"], round(h["latency"], 3)) for h in hidden_raw]
         )
@@ -1321,13 +1568,25 @@ class GameService:
         category: str = "fountain_pens",
     ) -> list[dict[str, Any]]:
         normalized_category = normalize_category(category)
-        pipeline = [
-            {"$match": {"status": "completed", **self._category_query(normalized_category)}},
-            {"$addFields": {"score_difference": {"$subtract": ["$human_score", "$ai_score"]}}},
-            {"$sort": {"score_difference": -1, "human_score": -1, "created_at": 1}},
-            {"$limit": int(limit)},
-        ]
-        games = await db.games.aggregate(pipeline).to_list(length=limit)
+        # score_difference is denormalized at score-update time, so this is a
+        # plain index-backed find + sort instead of an $addFields aggregation.
+        cursor = (
+            db.games.find(
+                {"status": "completed", **self._category_query(normalized_category)},
+                {
+                    "player_name": 1,
+                    "category": 1,
+                    "human_score": 1,
+                    "ai_score": 1,
+                    "score_difference": 1,
+                    "current_round": 1,
+                    "created_at": 1,
+                },
+            )
+            .sort([("score_difference", -1), ("human_score", -1), ("created_at", 1)])
+            .limit(int(limit))
+        )
+        games = await cursor.to_list(length=limit)
 
         return [
             {
@@ -1336,7 +1595,7 @@ class GameService:
                 "category": self._game_category(game),
                 "human_score": int(game["human_score"]),
                 "ai_score": int(game["ai_score"]),
-                "score_difference": int(game["human_score"] - game["ai_score"]),
+                "score_difference": int(game.get("score_difference", game["human_score"] - game["ai_score"])),
                 "rounds_completed": int(game.get("current_round", 0)),
                 "created_at": game["created_at"],
             }
@@ -1352,10 +1611,31 @@ class GameService:
     ) -> list[dict[str, Any]]:
         """Return completed games for a given player, most recent first."""
         normalized_category = normalize_category(category)
-        cursor = db.games.find(
-            {"player_name": player_name, "status": "completed", **self._category_query(normalized_category)},
-        ).sort("created_at", -1).limit(limit)
-        games = await cursor.to_list(length=limit)
+        # One aggregation: game page plus per-game AI-correct counts joined
+        # server-side, instead of a find followed by a counting round-trip.
+        games = await db.games.aggregate([
+            {"$match": {
+                "player_name": player_name,
+                "status": "completed",
+                **self._category_query(normalized_category),
+            }},
+            {"$sort": {"created_at": -1}},
+            {"$limit": int(limit)},
+            {"$lookup": {
+                "from": "game_rounds",
+                "let": {"gid": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$game_id", "$$gid"]},
+                        {"$eq": ["$completed", True]},
+                        {"$eq": ["$ai_correct", True]},
+                    ]}}},
+                    {"$count": "n"},
+                ],
+                "as": "_ai",
+            }},
+            {"$addFields": {"ai_correct_count": {"$ifNull": [{"$arrayElemAt": ["$_ai.n", 0]}, 0]}}},
+        ]).to_list(length=limit)
 
         results: list[dict[str, Any]] = []
         for game in games:
@@ -1363,11 +1643,7 @@ class GameService:
             total = int(game.get("current_round", 0))
             h = int(game.get("human_score", 0))
             a = int(game.get("ai_score", 0))
-
-            # Count AI correct rounds
-            ai_correct = await db.game_rounds.count_documents(
-                {"game_id": game["_id"], "completed": True, "ai_correct": True}
-            )
+            ai_correct = int(game.get("ai_correct_count", 0))
 
             results.append({
                 "game_id": game_id,
@@ -6,9 +6,16 @@ from typing import Iterable
 
 import numpy as np
 
+# Optional fast JSON codec for session state; stdlib json handles it when
+# orjson is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from sqlalchemy.orm import Session
 
-from ..ml.prefix_cf import FeatureSpace, PrefixCFModel
+from ..ml.prefix_cf import FeatureSpace, PrefixCFModel, decode_state, encode_state
 from ..ml.pbcf_nmf import PBCFEngine
 from ..models import Product, Session as UserSession, Selection, PrefixRating
 
@@ -18,6 +25,9 @@ class Recommender:
         self.feature_space: FeatureSpace | None = None
         self.model: PrefixCFModel | None = None
         self.item_vectors: dict[int, np.ndarray] = {}
+        self._item_ids: list[int] = []
+        self._id_to_row: dict[int, int] = {}
+        self._item_matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
         self.pbcf = PBCFEngine(k=6, iters=40)
         self._rating_count = 0
 
@@ -25,7 +35,12 @@ class Recommender:
         products = db.query(Product).all()
         self.feature_space = FeatureSpace.build(products)
         self.model = PrefixCFModel(self.feature_space)
-        self.item_vectors = {product.id: self.feature_space.vectorize(product) for product in products}
+        self._item_ids = [product.id for product in products]
+        self._id_to_row = {pid: row for row, pid in enumerate(self._item_ids)}
+        self._item_matrix = self.feature_space.vectorize_batch(products)
+        self.item_vectors = {
+            pid: self._item_matrix[row] for pid, row in self._id_to_row.items()
+        }
         self._refresh_pbcf(db)
 
     def _refresh_pbcf(self, db: Session) -> None:
@@ -36,12 +51,18 @@ class Recommender:
 
     def load_state(self, session: UserSession) -> dict:
         if session.state_json:
-            return json.loads(session.state_json)
+            if orjson is not None:
+                return decode_state(orjson.loads(session.state_json))
+            return decode_state(json.loads(session.state_json))
         assert self.model is not None
         return self.model.init_state()
 
     def save_state(self, session: UserSession, state: dict) -> None:
-        session.state_json = json.dumps(state)
+        encoded = encode_state(state)
+        if orjson is not None:
+            session.state_json = orjson.dumps(encoded).decode()
+        else:
+            session.state_json = json.dumps(encoded)
 
     def update_with_selection(self, session: UserSession, product: Product, is_exception: bool) -> None:
         assert self.model is not None
@@ -63,38 +84,63 @@ class Recommender:
 
         state = self.load_state(session)
         selected_ids = {s.product_id for s in session.selections}
-        candidates = [p for p in db.query(Product).all() if p.id not in selected_ids]
+        # Resolve the selection filter to matrix rows once, then walk the
+        # catalog in a single pass instead of building a filtered list first.
+        selected_rows = {
+            self._id_to_row[pid] for pid in selected_ids if pid in self._id_to_row
+        }
 
         predicted_ratings = self.pbcf.predict_user_ratings(db, session.user_id)
-        current_prefix = "-".join(str(s.product_id) for s in session.selections)
-
-        scored = []
-        for product in candidates:
-            vec = self.item_vectors.get(product.id)
-            if vec is None:
+        current_prefix = tuple(s.product_id for s in session.selections)
+
+        # One matmul over the catalog matrix replaces per-candidate score_item.
+        content_scores = self.model.score_batch(state, self._item_matrix)
+
+        # Project the PBCF dict onto the catalog once, then fuse with content
+        # scores; the candidate loop becomes a single array read per product.
+        # Prefix keys are product-id tuples, so a key that extends the
+        # current prefix by one selection is a slice compare and its
+        # candidate product is the last element.
+        pbcf_scores = np.full(len(self._item_ids), np.nan, dtype=np.float32)
+        for prefix_key, rating in predicted_ratings.items():
+            if prefix_key[:-1] != current_prefix:
                 continue
-            # Prefix-based CF score when available; otherwise fallback to content-based score.
-            prefix_key = f"{current_prefix}-{product.id}" if current_prefix else str(product.id)
-            if prefix_key in predicted_ratings:
-                score = predicted_ratings[prefix_key]
-            else:
-                score = self.model.score_item(state, vec)
-            scored.append((score, product, vec))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        strong = scored[:limit]
+            row = self._id_to_row.get(prefix_key[-1])
+            if row is not None:
+                pbcf_scores[row] = rating
+        final_scores = np.where(np.isnan(pbcf_scores), content_scores, pbcf_scores)
+
+        candidates = []
+        for product in db.query(Product).all():
+            row = self._id_to_row.get(product.id)
+            if row is None or row in selected_rows:
+                continue
+            candidates.append((product, row))
 
+        # Top-k and bottom-pool selection via argpartition — O(N) instead of
+        # a full O(N log N) sort with a Python comparator.
+        strong: list[Product] = []
         wildcard = None
-        if scored:
-            diverse_pool = scored[-max(10, len(scored) // 8):]
-            wildcard = random.choice(diverse_pool)[1]
-
-        selected_vecs = [self.item_vectors[s.product_id] for s in session.selections if s.product_id in self.item_vectors]
-        coherence = self.model.coherence_score(selected_vecs)
+        if candidates:
+            cand_scores = final_scores[np.array([row for _, row in candidates], dtype=np.intp)]
+
+            k = min(limit, len(candidates))
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+            top = top[np.argsort(-cand_scores[top], kind="stable")]
+            strong = [candidates[int(i)][0] for i in top]
+
+            pool_size = min(len(candidates), max(10, len(candidates) // 8))
+            diverse_pool = np.argpartition(cand_scores, pool_size - 1)[:pool_size]
+            wildcard = candidates[int(random.choice(diverse_pool))][0]
+
+        coherence = self.model.coherence_from_state(state)
+        if coherence is None:
+            selected_vecs = [self.item_vectors[s.product_id] for s in session.selections if s.product_id in self.item_vectors]
+            coherence = self.model.coherence_score(selected_vecs)
         predicted_prefix = self.model.predict_prefix_rating(state)
 
         return {
-            "strong": [p for _, p, _ in strong],
+            "strong": strong,
             "wildcard": wildcard,
             "coherence_score": coherence,
             "predicted_prefix_rating": predicted_prefix,
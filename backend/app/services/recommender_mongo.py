@@ -8,7 +8,7 @@ import numpy as np
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from ..ml.prefix_cf import FeatureSpace, PrefixCFModel
+from ..ml.prefix_cf import FeatureSpace, PrefixCFModel, decode_state, encode_state
 from ..ml.pbcf_nmf_mongo import PBCFEngineMongo
 from ..models_mongo import Product
 
@@ -21,6 +21,11 @@ class RecommenderMongo:
         self.model: PrefixCFModel | None = None
         self.item_vectors: dict[str, np.ndarray] = {}
         self.item_norms: dict[str, float] = {}
+        self._item_ids: list[str] = []
+        self._id_to_row: dict[str, int] = {}
+        self._item_matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._products_by_id: dict[str, Product] = {}
+        self._catalog_count = -1
         self.pbcf = PBCFEngineMongo(k=6, iters=40)
         self._rating_count = 0
 
@@ -31,8 +36,17 @@ class RecommenderMongo:
 
         self.feature_space = FeatureSpace.build(products)
         self.model = PrefixCFModel(self.feature_space)
-        self.item_vectors = {str(p.id): self.feature_space.vectorize(p) for p in products}
+        # SoA view of the catalog: one contiguous (N, D) matrix in _item_ids
+        # order, so scoring is a single BLAS gemv instead of N dict lookups.
+        self._item_ids = [str(p.id) for p in products]
+        self._id_to_row = {pid: row for row, pid in enumerate(self._item_ids)}
+        self._item_matrix = self.feature_space.vectorize_batch(products)
+        self.item_vectors = {
+            pid: self._item_matrix[row] for pid, row in self._id_to_row.items()
+        }
         self.item_norms = {pid: float(np.linalg.norm(vec)) for pid, vec in self.item_vectors.items()}
+        self._products_by_id = {pid: product for pid, product in zip(self._item_ids, products)}
+        self._catalog_count = len(products)
         await self._refresh_pbcf(db)
 
     async def _refresh_pbcf(self, db: AsyncIOMotorDatabase) -> None:
@@ -48,7 +62,7 @@ class RecommenderMongo:
         if not state:
             assert self.model is not None
             state = self.model.init_state()
-        return state
+        return decode_state(state)
 
     async def save_state(self, db: AsyncIOMotorDatabase, session_id: str, state: dict) -> None:
         """Save state to session document."""
@@ -57,7 +71,7 @@ class RecommenderMongo:
             sid = ObjectId(session_id)
         await db.sessions.update_one(
             {"_id": sid},
-            {"$set": {"state": state}}
+            {"$set": {"state": encode_state(state)}}
         )
 
     async def update_with_selection(
@@ -96,7 +110,9 @@ class RecommenderMongo:
     ) -> dict:
         """Generate recommendations for a session."""
         assert self.model is not None
-        if not self.item_vectors:
+        # Serve the catalog from the cache built by refresh(); a cheap count
+        # check detects ingest/removal without pulling every document.
+        if not self.item_vectors or await db.products.estimated_document_count() != self._catalog_count:
             await self.refresh(db)
         await self._refresh_pbcf(db)
 
@@ -114,54 +130,67 @@ class RecommenderMongo:
                 ).to_list(length=None)
                 selected_product_ids = {str(row.get("product_id")) for row in selections if row.get("product_id")}
 
-        # Get candidate products (not already selected)
-        excluded_object_ids = [ObjectId(pid) for pid in selected_product_ids if ObjectId.is_valid(pid)]
-        products_cursor = db.products.find({"_id": {"$nin": excluded_object_ids}})
-        candidates = [Product(**p) for p in await products_cursor.to_list(length=None)]
+        # Candidate products come straight from the in-memory catalog — no DB
+        # round-trip and no pydantic re-parsing per request.
+        candidate_ids = [pid for pid in self._item_ids if pid not in selected_product_ids]
 
         # Get predicted ratings from PBCF
         user_id = str(session["user_id"])
         predicted_ratings = await self.pbcf.predict_user_ratings(db, user_id)
 
         # Build current prefix
-        current_prefix = "-".join(sorted(selected_product_ids)) if selected_product_ids else ""
-
-        # Score candidates
-        scored = []
-        for product in candidates:
-            vec = self.item_vectors.get(str(product.id))
-            if vec is None:
+        current_prefix = tuple(sorted(selected_product_ids))
+
+        # Content scores for the whole catalog in one matmul; candidates then
+        # just index into the result.
+        content_scores = self.model.score_batch(state, self._item_matrix)
+
+        # Project the PBCF dict onto the catalog once (current_prefix is
+        # constant over the loop), then fuse with content scores so the
+        # candidate loop does a single array read instead of a key build
+        # plus dict lookup per product. Prefix keys are product-id tuples,
+        # so a key that extends the current prefix by one selection is a
+        # slice compare and its candidate product is the last element.
+        pbcf_scores = np.full(len(self._item_ids), np.nan, dtype=np.float32)
+        for prefix_key, rating in predicted_ratings.items():
+            if prefix_key[:-1] != current_prefix:
                 continue
+            row = self._id_to_row.get(prefix_key[-1])
+            if row is not None:
+                pbcf_scores[row] = rating
+        final_scores = np.where(np.isnan(pbcf_scores), content_scores, pbcf_scores)
+
+        # Top-k and bottom-pool selection via argpartition — O(N) instead of
+        # a full O(N log N) sort with a Python comparator.
+        strong: list[Product] = []
+        wildcard = None
+        if candidate_ids:
+            cand_rows = np.array([self._id_to_row[pid] for pid in candidate_ids], dtype=np.intp)
+            cand_scores = final_scores[cand_rows]
 
-            # Use PBCF prediction if available, otherwise fall back to content-based
-            prefix_key = f"{current_prefix}-{product.id}" if current_prefix else str(product.id)
-            if prefix_key in predicted_ratings:
-                score = predicted_ratings[prefix_key]
-            else:
-                score = self.model.score_item(state, vec)
-
-            scored.append((score, product, vec))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        strong = scored[:limit]
+            k = min(limit, len(candidate_ids))
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+            top = top[np.argsort(-cand_scores[top], kind="stable")]
+            strong = [self._products_by_id[candidate_ids[int(i)]] for i in top]
 
-        # Select wildcard from diverse pool
-        wildcard = None
-        if scored:
-            diverse_pool = scored[-max(10, len(scored) // 8):]
-            wildcard = random.choice(diverse_pool)[1]
+            # Select wildcard from the low-scoring (diverse) pool
+            pool_size = min(len(candidate_ids), max(10, len(candidate_ids) // 8))
+            diverse_pool = np.argpartition(cand_scores, pool_size - 1)[:pool_size]
+            wildcard = self._products_by_id[candidate_ids[int(random.choice(diverse_pool))]]
 
         # Calculate metrics
-        selected_vecs = [
-            self.item_vectors[sid]
-            for sid in selected_product_ids
-            if sid in self.item_vectors
-        ]
-        coherence = self.model.coherence_score(selected_vecs)
+        coherence = self.model.coherence_from_state(state)
+        if coherence is None:
+            selected_vecs = [
+                self.item_vectors[sid]
+                for sid in selected_product_ids
+                if sid in self.item_vectors
+            ]
+            coherence = self.model.coherence_score(selected_vecs)
         predicted_prefix = self.model.predict_prefix_rating(state)
 
         return {
-            "strong": [p for _, p, _ in strong],
+            "strong": strong,
             "wildcard": wildcard,
             "coherence_score": coherence,
             "predicted_prefix_rating": predicted_prefix,
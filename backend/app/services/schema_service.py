@@ -23,3 +23,10 @@ async def ensure_multicategory_compatibility(db: AsyncIOMotorDatabase) -> None:
     await db.products.create_index([("category", 1), ("release_year", 1)])
     await db.games.create_index([("category", 1), ("status", 1), ("created_at", -1)])
     await db.games.create_index([("category", 1), ("player_name", 1), ("created_at", -1)])
+    # Partial index keyed to the active-round lookup in get_game_status: only
+    # uncompleted rounds are indexed, so it stays tiny and skips the sort stage.
+    await db.game_rounds.create_index(
+        [("game_id", 1), ("round_number", 1)],
+        partialFilterExpression={"completed": False},
+        name="active_round_idx",
+    )
@@ -0,0 +1,46 @@
+"""
+Build the secondary read-path indexes on products after an ingest.
+
+The ingest only maintains the unique (category, source_id) index so each
+upsert pays for exactly one index; the browse/report indexes below are
+built here in a single pass once the data is in place.
+
+Usage:
+    cd backend
+    python -m scripts.build_product_indexes
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from pymongo import MongoClient
+
+# Ensure `app.*` imports work whether run from repo root or backend/.
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.db_mongo import settings
+
+
+SECONDARY_INDEXES = [
+    [("category", 1), ("title", 1)],
+    [("category", 1), ("release_year", 1)],
+    [("category", 1), ("vendor", 1)],
+]
+
+
+def build_indexes() -> None:
+    client = MongoClient(settings.mongodb_url)
+    db = client[settings.mongodb_db_name]
+
+    for keys in SECONDARY_INDEXES:
+        name = db.products.create_index(keys)
+        print(f"[indexes] built {name}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    build_indexes()
@@ -49,32 +49,63 @@ def get_sync_db():
 
 # ── Data loading ────────────────────────────────────────────────────────────
 
-def load_completed_games(db) -> list[dict]:
-    """Load all completed games."""
-    return list(db.games.find({"status": "completed"}).sort("created_at", 1))
+# Only the fields the analyses actually read; trimming the documents cuts
+# both wire bytes and BSON decode time. Per-round counts and averages are
+# computed server-side (see aggregate_round_stats), so the documents pulled
+# to the client only need what the rank analysis reads.
+GAME_PROJECTION = {"_id": 1, "human_score": 1, "ai_score": 1, "created_at": 1}
+ROUND_PROJECTION = {
+    "game_id": 1,
+    "ai_correct": 1,
+    "ai_top_k": 1,
+    "human_pick_id": 1,
+}
 
 
-def load_rounds_for_game(db, game_id) -> list[dict]:
-    """Load all completed rounds for a game, sorted by round number."""
+def load_completed_games(db) -> list[dict]:
+    """Load all completed games."""
     return list(
-        db.game_rounds.find({"game_id": game_id, "completed": True})
-        .sort("round_number", 1)
+        db.games.find({"status": "completed"}, projection=GAME_PROJECTION).sort("created_at", 1)
     )
 
 
+def load_rounds_by_game(db, game_ids: list) -> dict:
+    """Load completed rounds for all games in one query, grouped by game id."""
+    rounds_by_game: dict = defaultdict(list)
+    cursor = db.game_rounds.find(
+        {"game_id": {"$in": game_ids}, "completed": True},
+        projection=ROUND_PROJECTION,
+    ).sort([("game_id", 1), ("round_number", 1)])
+    for rnd in cursor:
+        rounds_by_game[rnd["game_id"]].append(rnd)
+    return rounds_by_game
+
+
+def aggregate_round_stats(db, game_ids: list) -> list[dict]:
+    """Group completed rounds server-side: per-round counts, correct tallies
+    and metric averages come back as one summary row per round number instead
+    of one document per round."""
+    pipeline = [
+        {"$match": {"game_id": {"$in": game_ids}, "completed": True}},
+        {
+            "$group": {
+                "_id": "$round_number",
+                "total": {"$sum": 1},
+                "correct": {"$sum": {"$cond": ["$ai_correct", 1, 0]}},
+                "avg_coherence": {"$avg": "$post_metrics.coherence_score"},
+                "avg_ppr": {"$avg": "$post_metrics.predicted_prefix_rating"},
+            }
+        },
+    ]
+    return list(db.game_rounds.aggregate(pipeline))
+
+
 # ── Analysis functions ──────────────────────────────────────────────────────
 
-def analyze_ai_accuracy(games: list[dict], rounds_by_game: dict) -> dict:
+def analyze_ai_accuracy(games: list[dict], round_groups: list[dict]) -> dict:
     """Overall AI accuracy across all games and rounds."""
-    total_rounds = 0
-    ai_correct_total = 0
-
-    for game in games:
-        gid = game["_id"]
-        for rnd in rounds_by_game.get(gid, []):
-            total_rounds += 1
-            if rnd.get("ai_correct"):
-                ai_correct_total += 1
+    total_rounds = sum(group["total"] for group in round_groups)
+    ai_correct_total = sum(group["correct"] for group in round_groups)
 
     return {
         "total_games": len(games),
@@ -85,50 +116,41 @@ def analyze_ai_accuracy(games: list[dict], rounds_by_game: dict) -> dict:
     }
 
 
-def analyze_accuracy_by_round(games: list[dict], rounds_by_game: dict, total_rounds: int = 5) -> dict[int, dict]:
+def analyze_accuracy_by_round(round_groups: list[dict], total_rounds: int = 5) -> dict[int, dict]:
     """AI accuracy broken down by round number — the core learning curve."""
-    by_round: dict[int, dict] = {}
+    by_round = {group["_id"]: group for group in round_groups}
 
+    result = {}
     for rn in range(1, total_rounds + 1):
-        correct = 0
-        total = 0
-        for game in games:
-            gid = game["_id"]
-            for rnd in rounds_by_game.get(gid, []):
-                if rnd["round_number"] == rn:
-                    total += 1
-                    if rnd.get("ai_correct"):
-                        correct += 1
-
-        by_round[rn] = {
+        group = by_round.get(rn)
+        total = group["total"] if group else 0
+        correct = group["correct"] if group else 0
+        result[rn] = {
             "total": total,
             "correct": correct,
             "accuracy": correct / total if total else 0.0,
         }
-
-    return by_round
+    return result
 
 
 def analyze_score_distribution(games: list[dict]) -> dict:
     """Distribution of final human and AI scores across games."""
-    human_scores = [g.get("human_score", 0) for g in games]
-    ai_scores = [g.get("ai_score", 0) for g in games]
-    deltas = [h - a for h, a in zip(human_scores, ai_scores)]
-
-    human_wins = sum(1 for d in deltas if d > 0)
-    ai_wins = sum(1 for d in deltas if d < 0)
-    ties = sum(1 for d in deltas if d == 0)
+    # Array-at-a-time: win/tie tallies and means come from vectorized
+    # reductions rather than repeated Python passes over the lists.
+    human = np.fromiter((g.get("human_score", 0) for g in games), dtype=np.int32, count=len(games))
+    ai = np.fromiter((g.get("ai_score", 0) for g in games), dtype=np.int32, count=len(games))
+    deltas = human - ai
 
     return {
-        "human_scores": human_scores,
-        "ai_scores": ai_scores,
-        "deltas": deltas,
-        "human_wins": human_wins,
-        "ai_wins": ai_wins,
-        "ties": ties,
-        "avg_human_score": float(np.mean(human_scores)) if human_scores else 0.0,
-        "avg_ai_score": float(np.mean(ai_scores)) if ai_scores else 0.0,
-        "avg_delta": float(np.mean(deltas)) if deltas else 0.0,
+        "human_scores": human.tolist(),
+        "ai_scores": ai.tolist(),
+        "deltas": deltas.tolist(),
+        "human_wins": int((deltas > 0).sum()),
+        "ai_wins": int((deltas < 0).sum()),
+        "ties": int((deltas == 0).sum()),
+        "avg_human_score": float(human.mean()) if human.size else 0.0,
+        "avg_ai_score": float(ai.mean()) if ai.size else 0.0,
+        "avg_delta": float(deltas.mean()) if deltas.size else 0.0,
     }
 
 
@@ -145,49 +167,36 @@ def analyze_ai_rank_when_wrong(games: list[dict], rounds_by_game: dict) -> dict:
             human_pick = rnd.get("human_pick_id")
             if not top_k or not human_pick:
                 continue
-            found = False
-            for rank, entry in enumerate(top_k, start=1):
-                if entry.get("product_id") == human_pick:
-                    ranks.append(rank)
-                    found = True
-                    break
-            if not found:
-                ranks.append(len(top_k) + 1)  # outside top-k
-
-    rank_counts: dict[int, int] = defaultdict(int)
-    for r in ranks:
-        rank_counts[r] += 1
+            # One dict build + lookup instead of a linear scan per round;
+            # missing picks land outside the top-k.
+            rank_by_id = {entry.get("product_id"): rank for rank, entry in enumerate(top_k, start=1)}
+            ranks.append(rank_by_id.get(human_pick, len(top_k) + 1))
+
+    arr = np.asarray(ranks, dtype=np.int32)
+    counts = np.bincount(arr) if arr.size else np.zeros(0, dtype=np.int64)
 
     return {
         "wrong_rounds": len(ranks),
-        "avg_rank_of_human_pick": float(np.mean(ranks)) if ranks else 0.0,
-        "median_rank": float(np.median(ranks)) if ranks else 0.0,
-        "rank_distribution": dict(sorted(rank_counts.items())),
-        "in_top_3": sum(1 for r in ranks if r <= 3),
-        "in_top_5": sum(1 for r in ranks if r <= 5),
+        "avg_rank_of_human_pick": float(arr.mean()) if arr.size else 0.0,
+        "median_rank": float(np.median(arr)) if arr.size else 0.0,
+        "rank_distribution": {int(rank): int(counts[rank]) for rank in np.flatnonzero(counts)},
+        "in_top_3": int((arr <= 3).sum()),
+        "in_top_5": int((arr <= 5).sum()),
     }
 
 
-def analyze_learning_metrics(games: list[dict], rounds_by_game: dict, total_rounds: int = 5) -> dict:
+def analyze_learning_metrics(round_groups: list[dict], total_rounds: int = 5) -> dict:
     """Track coherence and predicted prefix rating evolution across rounds."""
-    coherence_by_round: dict[int, list[float]] = defaultdict(list)
-    ppr_by_round: dict[int, list[float]] = defaultdict(list)
-
-    for game in games:
-        gid = game["_id"]
-        for rnd in rounds_by_game.get(gid, []):
-            rn = rnd["round_number"]
-            post = rnd.get("post_metrics", {})
-            if "coherence_score" in post:
-                coherence_by_round[rn].append(post["coherence_score"])
-            if "predicted_prefix_rating" in post:
-                ppr_by_round[rn].append(post["predicted_prefix_rating"])
+    # $avg skips documents where the metric is missing and returns null when
+    # none of them have it, matching the old client-side behaviour.
+    by_round = {group["_id"]: group for group in round_groups}
 
     result = {}
     for rn in range(1, total_rounds + 1):
+        group = by_round.get(rn, {})
         result[rn] = {
-            "avg_coherence": float(np.mean(coherence_by_round[rn])) if coherence_by_round[rn] else None,
-            "avg_predicted_prefix_rating": float(np.mean(ppr_by_round[rn])) if ppr_by_round[rn] else None,
+            "avg_coherence": group.get("avg_coherence"),
+            "avg_predicted_prefix_rating": group.get("avg_ppr"),
         }
 
     return result
@@ -195,31 +204,40 @@ def analyze_learning_metrics(games: list[dict], rounds_by_game: dict, total_roun
 
 # ── Plotting ────────────────────────────────────────────────────────────────
 
+# One figure reused across all plots — matplotlib figure construction (and
+# the font cache it touches) dominates sub-second plots, so each function
+# clears and relabels rather than building a fresh figure.
+_FIG = plt.figure() if HAS_MATPLOTLIB else None
+
+
 def plot_accuracy_by_round(by_round: dict[int, dict], path: Path):
     if not HAS_MATPLOTLIB:
         return
     rounds = sorted(by_round.keys())
     accuracies = [by_round[r]["accuracy"] for r in rounds]
 
-    plt.figure(figsize=(8, 5))
-    plt.bar(rounds, accuracies, color="#4a90d9", edgecolor="white", linewidth=0.5)
-    plt.axhline(y=np.mean(accuracies), color="#e74c3c", linestyle="--", label=f"Mean: {np.mean(accuracies):.1%}")
-    plt.xlabel("Round Number")
-    plt.ylabel("AI Accuracy")
-    plt.title("AI Prediction Accuracy by Round")
-    plt.xticks(rounds)
-    plt.ylim(0, 1.05)
-    plt.legend()
-    plt.grid(axis="y", alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(path, dpi=150)
-    plt.close()
+    _FIG.clear()
+    _FIG.set_size_inches(8, 5)
+    ax = _FIG.add_subplot(111)
+    ax.bar(rounds, accuracies, color="#4a90d9", edgecolor="white", linewidth=0.5)
+    ax.axhline(y=np.mean(accuracies), color="#e74c3c", linestyle="--", label=f"Mean: {np.mean(accuracies):.1%}")
+    ax.set_xlabel("Round Number")
+    ax.set_ylabel("AI Accuracy")
+    ax.set_title("AI Prediction Accuracy by Round")
+    ax.set_xticks(rounds)
+    ax.set_ylim(0, 1.05)
+    ax.legend()
+    ax.grid(axis="y", alpha=0.3)
+    _FIG.tight_layout()
+    _FIG.savefig(path, dpi=150)
 
 
 def plot_score_distribution(dist: dict, path: Path):
     if not HAS_MATPLOTLIB:
         return
-    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    _FIG.clear()
+    _FIG.set_size_inches(12, 5)
+    axes = _FIG.subplots(1, 2)
 
     # Score comparison
     games_range = range(1, len(dist["human_scores"]) + 1)
@@ -239,9 +257,8 @@ def plot_score_distribution(dist: dict, path: Path):
     axes[1].set_title("Score Delta Distribution")
     axes[1].grid(axis="y", alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(path, dpi=150)
-    plt.close()
+    _FIG.tight_layout()
+    _FIG.savefig(path, dpi=150)
 
 
 def plot_learning_metrics(metrics: dict, path: Path):
@@ -258,7 +275,9 @@ def plot_learning_metrics(metrics: dict, path: Path):
     if not valid_coh and not valid_ppr:
         return
 
-    fig, ax1 = plt.subplots(figsize=(8, 5))
+    _FIG.clear()
+    _FIG.set_size_inches(8, 5)
+    ax1 = _FIG.add_subplot(111)
 
     if valid_coh:
         rs, cs = zip(*valid_coh)
@@ -276,16 +295,19 @@ def plot_learning_metrics(metrics: dict, path: Path):
         ax2.tick_params(axis="y", labelcolor="#9b59b6")
         ax2.set_ylim(1, 5.2)
 
-    plt.title("Model Learning Metrics by Round")
+    ax1.set_title("Model Learning Metrics by Round")
     ax1.set_xticks(rounds)
     ax1.grid(axis="y", alpha=0.3)
-    fig.tight_layout()
-    plt.savefig(path, dpi=150)
-    plt.close()
+    _FIG.tight_layout()
+    _FIG.savefig(path, dpi=150)
 
 
 # ── Report generation ───────────────────────────────────────────────────────
 
+# Sliced per row instead of rebuilding a "█" * n string per round.
+FULL_BAR = "█" * 20
+
+
 def generate_summary(
     accuracy: dict,
     by_round: dict[int, dict],
@@ -317,7 +339,7 @@ def generate_summary(
 
     for rn in sorted(by_round.keys()):
         data = by_round[rn]
-        bar = "█" * int(data["accuracy"] * 20)
+        bar = FULL_BAR[: int(data["accuracy"] * 20)]
         lines.append(f"  Round {rn:2d}: {data['accuracy']:5.1%}  {bar}  ({data['correct']}/{data['total']})")
 
     lines.extend([
@@ -332,9 +354,10 @@ def generate_summary(
 
     if rank_analysis["rank_distribution"]:
         lines.append("  Rank distribution:")
-        for rank, count in sorted(rank_analysis["rank_distribution"].items()):
-            label = f"#{rank}" if rank <= 10 else "Outside top-k"
-            lines.append(f"    {label}: {count}")
+        lines.extend(
+            f"    {f'#{rank}' if rank <= 10 else 'Outside top-k'}: {count}"
+            for rank, count in sorted(rank_analysis["rank_distribution"].items())
+        )
 
     lines.extend([
         "",
@@ -364,17 +387,20 @@ def main():
 
     print(f"Found {len(games)} completed game(s). Analyzing...\n")
 
-    # Load all rounds
-    rounds_by_game: dict = {}
-    for game in games:
-        rounds_by_game[game["_id"]] = load_rounds_for_game(db, game["_id"])
+    game_ids = [game["_id"] for game in games]
+
+    # Per-round counts and averages come from one server-side aggregation;
+    # the per-document pull is kept only for the rank analysis, which needs
+    # the ai_top_k arrays.
+    round_groups = aggregate_round_stats(db, game_ids)
+    rounds_by_game = load_rounds_by_game(db, game_ids)
 
     # Run analyses
-    accuracy = analyze_ai_accuracy(games, rounds_by_game)
-    by_round = analyze_accuracy_by_round(games, rounds_by_game)
+    accuracy = analyze_ai_accuracy(games, round_groups)
+    by_round = analyze_accuracy_by_round(round_groups)
     scores = analyze_score_distribution(games)
     rank_analysis = analyze_ai_rank_when_wrong(games, rounds_by_game)
-    learning = analyze_learning_metrics(games, rounds_by_game)
+    learning = analyze_learning_metrics(round_groups)
 
     # Generate summary
     summary = generate_summary(accuracy, by_round, scores, rank_analysis, learning)
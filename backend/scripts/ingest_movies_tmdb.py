@@ -9,7 +9,14 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
 import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
 import sys
 import time
 from dataclasses import dataclass
@@ -17,8 +24,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import requests
-from pymongo import MongoClient
+import aiohttp
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import OperationFailure
 
 # Ensure `app.*` imports work whether run from repo root or backend/.
 ROOT_DIR = Path(__file__).resolve().parents[1]
@@ -31,6 +39,34 @@ from app.db_mongo import settings
 TMDB_BASE = "https://api.themoviedb.org/3"
 TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
 
+# The ingest is bound by HTTP latency, not CPU: detail fetches for a page run
+# concurrently under this semaphore while staying inside TMDB's rate limit.
+DETAIL_CONCURRENCY = 32
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Upserts are accumulated and flushed as one bulk_write per batch instead of
+# one round-trip per document; re-running after a crash is safe because the
+# writes are keyed upserts.
+BULK_BATCH_SIZE = 500
+
+# Checkpoint at year boundaries or every this many upserts rather than every
+# page; a stale checkpoint only costs harmless re-upserts on resume.
+CHECKPOINT_EVERY = 200
+
+# Progress messages buffer in memory and flush in batches (or immediately on
+# ERROR) instead of paying a stdout flush per message inside the async loop.
+logger = logging.getLogger("tmdb_ingest")
+_LOG_HANDLER = logging.handlers.MemoryHandler(
+    capacity=1000,
+    flushLevel=logging.ERROR,
+    target=logging.StreamHandler(),
+)
+
+
+def _configure_logging() -> None:
+    logger.setLevel(logging.INFO)
+    logger.addHandler(_LOG_HANDLER)
+
 
 @dataclass
 class IngestConfig:
@@ -44,7 +80,8 @@ class IngestConfig:
     end_year: int
 
 
-def _request(
+async def _request(
+    session: aiohttp.ClientSession,
     api_key: str,
     path: str,
     *,
@@ -59,23 +96,100 @@ def _request(
     last_error: Exception | None = None
     for attempt in range(retries):
         try:
-            response = requests.get(url, params=query, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            async with session.get(url, params=query) as response:
+                response.raise_for_status()
+                payload = await response.json()
+                # TMDB advertises the remaining budget; park until the window
+                # resets instead of tripping a 429 on the next call.
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    await asyncio.sleep(float(response.headers.get("Retry-After", 1.0)))
+                return payload
         except Exception as exc:  # noqa: BLE001
             last_error = exc
-            backoff = 2 ** attempt
-            time.sleep(backoff)
+            backoff = float(2 ** attempt)
+            if isinstance(exc, aiohttp.ClientResponseError) and exc.status == 429:
+                retry_after = (exc.headers or {}).get("Retry-After")
+                if retry_after is not None:
+                    try:
+                        backoff = float(retry_after)
+                    except ValueError:
+                        pass
+            await asyncio.sleep(backoff)
     if last_error:
         raise last_error
     raise RuntimeError("TMDB request failed unexpectedly")
 
 
+class _DetailCache:
+    """sqlite-backed movie-detail cache keyed by (movie id, language).
+
+    TMDB details rarely change, so re-runs with a new --max-movies or
+    adjusted filters skip the detail round-trips entirely for anything
+    fetched within the TTL.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float = 30 * 86400):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS details "
+            "(key TEXT PRIMARY KEY, fetched_at REAL, payload TEXT)"
+        )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        row = self._conn.execute(
+            "SELECT fetched_at, payload FROM details WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self._ttl:
+            return None
+        return json.loads(row[1])
+
+    def set(self, key: str, payload: dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO details VALUES (?, ?, ?)",
+            (key, time.time(), json.dumps(payload)),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# Tz-aware datetime.now costs ~1µs; at 50k documents a second-coarse cached
+# timestamp is indistinguishable for created_at / checkpoint stamps.
+_NOW_CACHE: list[Any] = [datetime.now(timezone.utc), time.monotonic()]
+
+
+def _utcnow() -> datetime:
+    if time.monotonic() - _NOW_CACHE[1] > 1.0:
+        _NOW_CACHE[0] = datetime.now(timezone.utc)
+        _NOW_CACHE[1] = time.monotonic()
+    return _NOW_CACHE[0]
+
+
+class _SlugTable(dict):
+    """Lazily-built str.translate table: alnum lowers, everything else dashes.
+
+    str.translate runs as one C loop over the codepoints instead of a Python
+    dispatch per character; unseen codepoints are classified once and cached.
+    """
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        repl = ch.lower() if ch.isalnum() else "-"
+        self[code] = repl
+        return repl
+
+
+_SLUG_TABLE = _SlugTable()
+_DASH_RUN_RE = re.compile(r"-+")
+
+
 def _slug(text: str) -> str:
-    base = "".join(ch.lower() if ch.isalnum() else "-" for ch in text)
-    while "--" in base:
-        base = base.replace("--", "-")
-    return base.strip("-")
+    return _DASH_RUN_RE.sub("-", text.translate(_SLUG_TABLE)).strip("-")
 
 
 def _decade_bucket(release_year: int | None) -> str | None:
@@ -135,31 +249,32 @@ def _normalized_movie_doc(detail: dict[str, Any], *, language: str) -> dict[str,
     popularity = detail.get("popularity")
     vote_count = int(detail.get("vote_count") or 0)
 
+    # Filter and projection fused with := so each name is stripped once.
     companies = [
-        (c.get("name") or "").strip()
+        name
         for c in detail.get("production_companies", [])
-        if (c.get("name") or "").strip()
+        if (name := (c.get("name") or "").strip())
     ]
     directors = [
-        (c.get("name") or "").strip()
+        name
         for c in detail.get("credits", {}).get("crew", [])
-        if c.get("job") == "Director" and (c.get("name") or "").strip()
+        if c.get("job") == "Director" and (name := (c.get("name") or "").strip())
     ]
     genres = [
-        (g.get("name") or "").strip()
+        name
         for g in detail.get("genres", [])
-        if (g.get("name") or "").strip()
+        if (name := (g.get("name") or "").strip())
     ]
     keywords = [
-        (k.get("name") or "").strip()
+        name
         for k in detail.get("keywords", {}).get("keywords", [])
-        if (k.get("name") or "").strip()
+        if (name := (k.get("name") or "").strip())
     ]
 
     countries = [
-        (c.get("iso_3166_1") or "").strip()
+        iso
         for c in detail.get("production_countries", [])
-        if (c.get("iso_3166_1") or "").strip()
+        if (iso := (c.get("iso_3166_1") or "").strip())
     ]
     primary_country = countries[0] if countries else None
 
@@ -204,7 +319,7 @@ def _normalized_movie_doc(detail: dict[str, Any], *, language: str) -> dict[str,
         "description": description,
         "url": f"https://www.themoviedb.org/movie/{tmdb_id}",
         "images": images,
-        "created_at": datetime.now(timezone.utc),
+        "created_at": _utcnow(),
         "movie_vote_count": vote_count,
         "language_requested": language,
     }
@@ -222,25 +337,130 @@ def _passes_quality_filters(doc: dict[str, Any], *, min_vote_count: int) -> bool
     return True
 
 
+# Rewrite the checkpoint log in place once it grows past this size; only the
+# latest line matters.
+CHECKPOINT_COMPACT_BYTES = 1 << 20
+
+
 def _load_checkpoint(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {"next_page": 1, "upserted_count": 0}
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        text = path.read_text(encoding="utf-8")
+    except Exception:  # noqa: BLE001
+        return {"next_page": 1, "upserted_count": 0}
+    # Append-log format: the last complete line wins; a torn trailing line
+    # from a crash just falls back to the previous entry.
+    for line in reversed(text.splitlines()):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            continue
+    try:
+        # Legacy single-object (indented) checkpoint files.
+        return json.loads(text)
     except Exception:  # noqa: BLE001
         return {"next_page": 1, "upserted_count": 0}
 
 
 def _save_checkpoint(path: Path, payload: dict[str, Any]) -> None:
+    # Append one line instead of rewriting the full state; the append is a
+    # single small write, so a crash can tear at most the last line.
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    line = json.dumps(payload) + "\n"
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(line)
+    if path.stat().st_size > CHECKPOINT_COMPACT_BYTES:
+        # Compact atomically down to the latest entry.
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(line, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def _discover_call(
+    session: aiohttp.ClientSession,
+    config: IngestConfig,
+    year: int,
+    page: int,
+):
+    return _request(
+        session,
+        config.api_key,
+        "/discover/movie",
+        params={
+            "language": config.language,
+            "include_adult": "false",
+            "include_video": "false",
+            "sort_by": "popularity.desc",
+            "page": page,
+            "primary_release_year": year,
+        },
+    )
 
 
-def ingest_movies(config: IngestConfig) -> None:
+async def _fetch_detail(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    config: IngestConfig,
+    cache: _DetailCache,
+    movie_id: int,
+) -> dict[str, Any] | None:
+    """Fetch one movie's detail payload; transient failures are skipped."""
+    cache_key = f"{movie_id}:{config.language}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    async with semaphore:
+        if config.sleep_ms > 0:
+            await asyncio.sleep(config.sleep_ms / 1000.0)
+        try:
+            detail = await _request(
+                session,
+                config.api_key,
+                f"/movie/{movie_id}",
+                params={
+                    "language": config.language,
+                    "append_to_response": "keywords,credits,release_dates",
+                },
+            )
+            cache.set(cache_key, detail)
+            return detail
+        except aiohttp.ClientResponseError as exc:
+            if exc.status in TRANSIENT_STATUSES:
+                logger.warning(
+                    "Transient detail error for movie %s (status=%s); skipping.",
+                    movie_id,
+                    exc.status,
+                )
+            else:
+                # Non-transient errors (e.g. 404) should not crash full ingest.
+                logger.warning(
+                    "Detail request failed for movie %s (status=%s); skipping.",
+                    movie_id,
+                    exc.status,
+                )
+            return None
+
+
+async def ingest_movies(config: IngestConfig) -> None:
     client = MongoClient(settings.mongodb_url)
     db = client[settings.mongodb_db_name]
     products = db.products
 
+    # Build the unique upsert index before writing anything: every upsert
+    # filters on (category, source_id), so creating it up front turns each
+    # write's lookup into an index seek instead of a collection scan. The
+    # secondary read-path indexes deliberately stay out of the write path —
+    # run scripts/build_product_indexes.py after the ingest.
+    try:
+        products.create_index([("category", 1), ("source_id", 1)], unique=True)
+    except OperationFailure as exc:
+        # Tolerate an index that already exists with a different spec.
+        logger.warning("Index creation skipped: %s", exc)
+
     checkpoint = _load_checkpoint(config.checkpoint_path)
     upserted = int(checkpoint.get("upserted_count", 0))
     if "current_year" not in checkpoint:
@@ -253,123 +473,187 @@ def ingest_movies(config: IngestConfig) -> None:
         current_year = int(checkpoint.get("current_year", config.start_year))
     current_year = min(max(current_year, config.end_year), config.start_year)
 
-    print(
-        f"Starting TMDB ingest at year {current_year}, page {page}, "
-        f"existing upserts={upserted}"
+    logger.info(
+        "Starting TMDB ingest at year %s, page %s, existing upserts=%s",
+        current_year,
+        page,
+        upserted,
     )
-    while upserted < config.max_movies and current_year >= config.end_year:
-        try:
-            discover = _request(
-                config.api_key,
-                "/discover/movie",
-                params={
-                    "language": config.language,
-                    "include_adult": "false",
-                    "include_video": "false",
-                    "sort_by": "popularity.desc",
-                    "page": page,
-                    "primary_release_year": current_year,
-                },
-            )
-        except requests.HTTPError as exc:
-            status = exc.response.status_code if exc.response is not None else None
-            # Resilient handling for intermittent TMDB failures.
-            if status in {408, 429, 500, 502, 503, 504}:
-                print(
-                    f"Transient TMDB error on year={current_year}, page={page}, "
-                    f"status={status}; skipping page and continuing."
+    _LOG_HANDLER.flush()
+    pending_writes: list[UpdateOne] = []
+
+    def _flush_writes() -> None:
+        if pending_writes:
+            products.bulk_write(pending_writes, ordered=False)
+            pending_writes.clear()
+
+    detail_cache = _DetailCache(ROOT_DIR / "data" / "tmdb_detail_cache.sqlite3")
+    semaphore = asyncio.Semaphore(DETAIL_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit_per_host=64)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        # The next discover page is launched while the current page's details
+        # are still in flight, so discovery RTTs hide behind detail work.
+        # (cursor, task) — discarded when the cursor prediction was wrong.
+        pending_discover: tuple[tuple[int, int], asyncio.Task] | None = None
+
+        async def _discard_pending() -> None:
+            nonlocal pending_discover
+            if pending_discover is None:
+                return
+            stale = pending_discover[1]
+            pending_discover = None
+            stale.cancel()
+            with contextlib.suppress(Exception):
+                await stale
+
+        checkpointed_upserts = upserted
+        while upserted < config.max_movies and current_year >= config.end_year:
+            if pending_discover is not None and pending_discover[0] == (current_year, page):
+                discover_task = pending_discover[1]
+                pending_discover = None
+            else:
+                await _discard_pending()
+                discover_task = asyncio.create_task(
+                    _discover_call(session, config, current_year, page)
                 )
-                page += 1
-                if page > 500:
-                    current_year -= 1
-                    page = 1
-                _save_checkpoint(
-                    config.checkpoint_path,
-                    {
-                        "current_year": current_year,
-                        "next_page": page,
-                        "upserted_count": upserted,
-                        "updated_at": datetime.now(timezone.utc).isoformat(),
-                    },
-                )
-                continue
-            raise
-        results = discover.get("results", [])
-        total_pages = int(discover.get("total_pages") or page)
-        capped_total_pages = max(1, min(total_pages, 500))
-        if not results:
-            # No results for this year/page; advance to next year.
-            current_year -= 1
-            page = 1
-            continue
-
-        for summary in results:
-            if upserted >= config.max_movies:
-                break
-            movie_id = summary.get("id")
-            if not movie_id:
-                continue
             try:
-                detail = _request(
-                    config.api_key,
-                    f"/movie/{movie_id}",
-                    params={
-                        "language": config.language,
-                        "append_to_response": "keywords,credits,release_dates",
-                    },
-                )
-            except requests.HTTPError as exc:
-                status = exc.response.status_code if exc.response is not None else None
-                if status in {408, 429, 500, 502, 503, 504}:
-                    print(f"Transient detail error for movie {movie_id} (status={status}); skipping.")
+                discover = await discover_task
+            except aiohttp.ClientResponseError as exc:
+                # Resilient handling for intermittent TMDB failures.
+                if exc.status in TRANSIENT_STATUSES:
+                    logger.warning(
+                        "Transient TMDB error on year=%s, page=%s, status=%s; "
+                        "skipping page and continuing.",
+                        current_year,
+                        page,
+                        exc.status,
+                    )
+                    page += 1
+                    if page > 500:
+                        current_year -= 1
+                        page = 1
+                    _flush_writes()
+                    _save_checkpoint(
+                        config.checkpoint_path,
+                        {
+                            "current_year": current_year,
+                            "next_page": page,
+                            "upserted_count": upserted,
+                            "updated_at": _utcnow().isoformat(),
+                        },
+                    )
                     continue
-                # Non-transient errors (e.g. 404) should not crash full ingest.
-                print(f"Detail request failed for movie {movie_id} (status={status}); skipping.")
+                raise
+            results = discover.get("results", [])
+            total_pages = int(discover.get("total_pages") or page)
+            capped_total_pages = max(1, min(total_pages, 500))
+            if not results:
+                # No results for this year/page; advance to next year.
+                current_year -= 1
+                page = 1
                 continue
 
-            doc = _normalized_movie_doc(detail, language=config.language)
-            if not doc:
-                continue
-            if not _passes_quality_filters(doc, min_vote_count=config.min_vote_count):
-                continue
+            # With capped_total_pages known, the next cursor is determined;
+            # prefetch its discover page so it is already resolving while the
+            # details below are fetched.
+            if page + 1 <= capped_total_pages:
+                next_cursor = (current_year, page + 1)
+            else:
+                next_cursor = (current_year - 1, 1)
+            if next_cursor[0] >= config.end_year and upserted < config.max_movies:
+                pending_discover = (
+                    next_cursor,
+                    asyncio.create_task(_discover_call(session, config, *next_cursor)),
+                )
 
-            source_id = doc["source_id"]
-            products.update_one(
-                {"category": "movies", "source_id": source_id},
-                {"$set": doc},
-                upsert=True,
+            # Detail fetches for the page are independent; run them
+            # concurrently and keep the normalize/upsert pass sequential.
+            # Discover summaries already carry vote_count, so movies that
+            # cannot pass the quality filter never cost a detail request.
+            details = await asyncio.gather(
+                *(
+                    _fetch_detail(session, semaphore, config, detail_cache, summary["id"])
+                    for summary in results
+                    if summary.get("id")
+                    and int(summary.get("vote_count") or 0) >= config.min_vote_count
+                )
             )
-            upserted += 1
 
-            if upserted % 50 == 0:
-                print(f"Upserted {upserted} movies...")
+            for detail in details:
+                if upserted >= config.max_movies:
+                    break
+                if not detail:
+                    continue
 
-            time.sleep(max(config.sleep_ms, 0) / 1000.0)
+                doc = _normalized_movie_doc(detail, language=config.language)
+                if not doc:
+                    continue
+                if not _passes_quality_filters(doc, min_vote_count=config.min_vote_count):
+                    continue
 
-        page += 1
-        if page > capped_total_pages:
-            print(
-                f"Finished year {current_year} "
-                f"(pages: {capped_total_pages}, upserts: {upserted})."
-            )
-            current_year -= 1
-            page = 1
+                source_id = doc["source_id"]
+                pending_writes.append(
+                    UpdateOne(
+                        {"category": "movies", "source_id": source_id},
+                        {"$set": doc},
+                        upsert=True,
+                    )
+                )
+                if len(pending_writes) >= BULK_BATCH_SIZE:
+                    _flush_writes()
+                upserted += 1
+
+                if upserted % 50 == 0:
+                    logger.info("Upserted %s movies...", upserted)
+
+            page += 1
+            year_rolled = page > capped_total_pages
+            if year_rolled:
+                _flush_writes()
+                logger.info(
+                    "Finished year %s (pages: %s, upserts: %s).",
+                    current_year,
+                    capped_total_pages,
+                    upserted,
+                )
+                _LOG_HANDLER.flush()
+                current_year -= 1
+                page = 1
+
+            # Persisting every page serialized the pipeline on file I/O;
+            # flush boundaries are frequent enough for cheap resumes. The
+            # flush must precede the save: a checkpoint may never claim
+            # progress still buffered in pending_writes, or a crash in the
+            # gap would skip those pages on resume without their upserts.
+            if year_rolled or upserted - checkpointed_upserts >= CHECKPOINT_EVERY:
+                checkpointed_upserts = upserted
+                _flush_writes()
+                _save_checkpoint(
+                    config.checkpoint_path,
+                    {
+                        "current_year": current_year,
+                        "next_page": page,
+                        "upserted_count": upserted,
+                        "updated_at": _utcnow().isoformat(),
+                    },
+                )
 
+        await _discard_pending()
+        _flush_writes()
         _save_checkpoint(
             config.checkpoint_path,
             {
                 "current_year": current_year,
                 "next_page": page,
                 "upserted_count": upserted,
-                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": _utcnow().isoformat(),
             },
         )
 
-    products.create_index([("category", 1), ("source_id", 1)], unique=True)
-    products.create_index([("category", 1), ("title", 1)])
-    products.create_index([("category", 1), ("release_year", 1)])
-    products.create_index([("category", 1), ("vendor", 1)])
-    print(f"Ingest complete. Total upserts this run reached: {upserted}")
+    logger.info("Ingest complete. Total upserts this run reached: %s", upserted)
+    _LOG_HANDLER.flush()
+    detail_cache.close()
     client.close()
 
 
@@ -390,6 +674,7 @@ def parse_args() -> argparse.Namespace:
 
 
 def main() -> None:
+    _configure_logging()
     args = parse_args()
     api_key = (settings.tmdb_api_key or "").strip()
     if not api_key:
@@ -405,7 +690,7 @@ def main() -> None:
         start_year=args.start_year,
         end_year=args.end_year,
     )
-    ingest_movies(config)
+    asyncio.run(ingest_movies(config))
 
 
 if __name__ == "__main__":
@@ -2,10 +2,18 @@ import json
 import sys
 from pathlib import Path
 
+# Optional fast JSON codec for the per-product tags/options columns; stdlib
+# json handles them when orjson is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.db import Base, engine, SessionLocal
@@ -19,38 +27,54 @@ def load_products(db: Session):
     if not PRODUCTS_JSON.exists():
         raise SystemExit("products.json not found. Run scrape_gouletpens.py first.")
 
-    data = json.loads(PRODUCTS_JSON.read_text(encoding="utf-8"))
+    raw = PRODUCTS_JSON.read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    if orjson is not None:
+        _dumps = lambda value: orjson.dumps(value).decode()  # noqa: E731
+    else:
+        _dumps = json.dumps
 
     db.query(ProductImage).delete()
     db.query(Product).delete()
-    db.commit()
 
-    for item in data:
-        product = Product(
-            source_id=item.get("source_id"),
-            title=item.get("title"),
-            handle=item.get("handle"),
-            vendor=item.get("vendor"),
-            product_type=item.get("product_type"),
-            price_min=item.get("price_min"),
-            price_max=item.get("price_max"),
-            currency=item.get("currency"),
-            tags_json=json.dumps(item.get("tags", [])),
-            options_json=json.dumps(item.get("options", {})),
-            description=item.get("description"),
-            url=item.get("url"),
+    # Two executemany inserts replace one ORM add + flush per product and
+    # one add per image. The tables were just emptied, so product ids can be
+    # assigned up front and image rows reference them without flushing.
+    product_rows: list[dict] = []
+    image_rows: list[dict] = []
+    for product_id, item in enumerate(data, start=1):
+        product_rows.append(
+            {
+                "id": product_id,
+                "source_id": item.get("source_id"),
+                "title": item.get("title"),
+                "handle": item.get("handle"),
+                "vendor": item.get("vendor"),
+                "product_type": item.get("product_type"),
+                "price_min": item.get("price_min"),
+                "price_max": item.get("price_max"),
+                "currency": item.get("currency"),
+                "tags_json": _dumps(item.get("tags", [])),
+                "options_json": _dumps(item.get("options", {})),
+                "description": item.get("description"),
+                "url": item.get("url"),
+            }
         )
-        db.add(product)
-        db.flush()
-        for img in item.get("images", []):
-            db.add(
-                ProductImage(
-                    product_id=product.id,
-                    url=img.get("url"),
-                    alt=img.get("alt"),
-                    position=img.get("position"),
-                )
-            )
+        image_rows.extend(
+            {
+                "product_id": product_id,
+                "url": img.get("url"),
+                "alt": img.get("alt"),
+                "position": img.get("position"),
+            }
+            for img in item.get("images", [])
+        )
+
+    if product_rows:
+        db.execute(insert(Product), product_rows)
+    if image_rows:
+        db.execute(insert(ProductImage), image_rows)
     db.commit()
 
 
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import shutil
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -35,6 +36,23 @@ def _timestamp() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
 
+def _dump_collection(args: tuple[str, str, str, str]) -> str:
+    """Worker: stream one collection to JSONL. Opens its own MongoClient
+    because pymongo clients are not fork-safe."""
+    name, backup_dir, mongo_url, db_name = args
+    client = MongoClient(mongo_url)
+    db = client[db_name]
+    # Stream one document per line instead of materializing the whole
+    # collection and one giant JSON string; peak memory stays at a single
+    # document regardless of collection size.
+    with open(Path(backup_dir) / f"{name}.jsonl", "w", encoding="utf-8") as handle:
+        for doc in db[name].find().batch_size(1000):
+            handle.write(dumps(doc))
+            handle.write("\n")
+    client.close()
+    return name
+
+
 def backup_database(db_name: str) -> Path:
     backup_path = BACKUP_DIR / f"multicategory_{_timestamp()}"
     backup_path.mkdir(parents=True, exist_ok=True)
@@ -61,37 +79,38 @@ def backup_database(db_name: str) -> Path:
         except subprocess.CalledProcessError as exc:
             print(f"[backup] mongodump failed, falling back to JSON export: {exc.stderr}")
 
-    client = MongoClient(settings.mongodb_url)
-    db = client[db_name]
-    for name in COLLECTIONS_TO_BACKUP:
-        docs = list(db[name].find())
-        (backup_path / f"{name}.json").write_text(dumps(docs, indent=2), encoding="utf-8")
-    client.close()
+    # One worker per collection: wall time becomes the largest collection's
+    # dump instead of the sum of all seven.
+    work = [
+        (name, str(backup_path), settings.mongodb_url, db_name)
+        for name in COLLECTIONS_TO_BACKUP
+    ]
+    with ProcessPoolExecutor(max_workers=min(8, len(COLLECTIONS_TO_BACKUP))) as pool:
+        list(pool.map(_dump_collection, work))
     print(f"[backup] JSON fallback completed: {backup_path}")
     return backup_path
 
 
 def normalize_reference_types(db) -> None:
-    # sessions.user_id -> string
-    for doc in db.sessions.find({"user_id": {"$type": "objectId"}}, {"user_id": 1}):
-        db.sessions.update_one({"_id": doc["_id"]}, {"$set": {"user_id": str(doc["user_id"])}})
-
-    # selections: session_id/product_id -> string
-    for doc in db.selections.find({"session_id": {"$type": "objectId"}}, {"session_id": 1}):
-        db.selections.update_one({"_id": doc["_id"]}, {"$set": {"session_id": str(doc["session_id"])}})
-    for doc in db.selections.find({"product_id": {"$type": "objectId"}}, {"product_id": 1}):
-        db.selections.update_one({"_id": doc["_id"]}, {"$set": {"product_id": str(doc["product_id"])}})
-
-    # prefix_ratings.session_id -> string
-    for doc in db.prefix_ratings.find({"session_id": {"$type": "objectId"}}, {"session_id": 1}):
-        db.prefix_ratings.update_one({"_id": doc["_id"]}, {"$set": {"session_id": str(doc["session_id"])}})
-
-    # users.sessions[] -> string list
-    for doc in db.users.find({"sessions.0": {"$exists": True}}, {"sessions": 1}):
-        sessions = doc.get("sessions", [])
-        normalized = [str(item) for item in sessions]
-        if normalized != sessions:
-            db.users.update_one({"_id": doc["_id"]}, {"$set": {"sessions": normalized}})
+    # Server-side coercion: one update_many with a $toString pipeline per
+    # field, instead of a find() cursor plus one update_one round-trip per
+    # document.
+    for collection, field in (
+        (db.sessions, "user_id"),
+        (db.selections, "session_id"),
+        (db.selections, "product_id"),
+        (db.prefix_ratings, "session_id"),
+    ):
+        collection.update_many(
+            {field: {"$type": "objectId"}},
+            [{"$set": {field: {"$toString": f"${field}"}}}],
+        )
+
+    # users.sessions[] -> string list; $map coerces the whole array in place.
+    db.users.update_many(
+        {"sessions": {"$elemMatch": {"$type": "objectId"}}},
+        [{"$set": {"sessions": {"$map": {"input": "$sessions", "in": {"$toString": "$$this"}}}}}],
+    )
 
 
 def migrate_products(db) -> None:
@@ -122,22 +141,54 @@ def migrate_games(db) -> None:
     )
     print(f"[games] schema_version set: {result.modified_count}")
 
+    # The leaderboard sorts on the denormalized score_difference, and a
+    # missing field compares as null — below every number — so completed
+    # games from before the denormalization would sink to the bottom.
+    result = db.games.update_many(
+        {"status": "completed", "score_difference": {"$exists": False}},
+        [{"$set": {"score_difference": {"$subtract": ["$human_score", "$ai_score"]}}}],
+    )
+    print(f"[games] score_difference backfilled: {result.modified_count}")
+
 
 def migrate_game_rounds(db) -> None:
-    game_category = {g["_id"]: g.get("category", "fountain_pens") for g in db.games.find({}, {"category": 1})}
-
-    updates = 0
-    for row in db.game_rounds.find({}, {"game_id": 1, "category": 1}):
-        update_set = {}
-        if "category" not in row:
-            gid = row.get("game_id")
-            update_set["category"] = game_category.get(gid, "fountain_pens")
-        if "schema_version" not in row:
-            update_set["schema_version"] = 2
-        if update_set:
-            db.game_rounds.update_one({"_id": row["_id"]}, {"$set": update_set})
-            updates += 1
-    print(f"[game_rounds] migrated docs: {updates}")
+    # Server-side join + merge: rounds missing either field pull their game's
+    # category via $lookup and are written back with $merge, so neither the
+    # games dict nor the per-round updates cross the wire.
+    pending_filter = {
+        "$or": [
+            {"category": {"$exists": False}},
+            {"schema_version": {"$exists": False}},
+        ]
+    }
+    pending = db.game_rounds.count_documents(pending_filter)
+    db.game_rounds.aggregate(
+        [
+            {"$match": pending_filter},
+            {
+                "$lookup": {
+                    "from": "games",
+                    "localField": "game_id",
+                    "foreignField": "_id",
+                    "as": "_g",
+                }
+            },
+            {
+                "$set": {
+                    "category": {
+                        "$ifNull": [
+                            "$category",
+                            {"$ifNull": [{"$first": "$_g.category"}, "fountain_pens"]},
+                        ]
+                    },
+                    "schema_version": {"$ifNull": ["$schema_version", 2]},
+                }
+            },
+            {"$unset": "_g"},
+            {"$merge": {"into": "game_rounds", "whenMatched": "replace"}},
+        ]
+    )
+    print(f"[game_rounds] migrated docs: {pending}")
 
 
 def ensure_indexes(db) -> None:
@@ -152,6 +203,17 @@ def ensure_indexes(db) -> None:
     except Exception as exc:  # noqa: BLE001
         print(f"[indexes] unable to create unique (category, source_id): {exc}")
 
+    # Every index taxes each write; surface usage counters so indexes that
+    # never serve a query can be identified and dropped.
+    try:
+        stats = db.products.aggregate(
+            [{"$indexStats": {}}, {"$project": {"name": 1, "accesses.ops": 1}}]
+        )
+        for row in stats:
+            print(f"[indexes] {row['name']}: ops={row.get('accesses', {}).get('ops', 0)}")
+    except Exception as exc:  # noqa: BLE001
+        print(f"[indexes] $indexStats unavailable: {exc}")
+
 
 def main() -> None:
     print(f"Using MongoDB: {settings.mongodb_url}")
@@ -8,65 +8,149 @@ Run with: python -m backend.scripts.migrate_to_mongo
 from __future__ import annotations
 
 import asyncio
+import json
 import sys
+from collections import defaultdict
+from itertools import islice
 from pathlib import Path
 
+# Optional fast JSON codec for session state blobs; stdlib json is the
+# fallback when orjson is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, WriteConcern
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import selectinload, sessionmaker
 
 from app.models import Product, ProductImage, User, Session as UserSession, Selection, PrefixRating
 from app.db import DB_PATH, SessionLocal
 
+# Inserts go out as one insert_many per batch instead of one round-trip per
+# document; inserted_ids come back in input order, so ID maps are built by
+# zipping rows with the result instead of re-querying Mongo per row.
+BATCH_SIZE = 1000
+
+
+async def _stream_batches(produce_rows):
+    """Yield BATCH_SIZE lists of rows from a blocking producer.
+
+    The next batch is read under asyncio.to_thread while the caller awaits
+    the current batch's writes, so the SQLite read of batch N+1 overlaps the
+    Mongo write of batch N instead of serializing with it.
+    """
+    rows = iter(produce_rows())
+
+    def _next_batch():
+        return list(islice(rows, BATCH_SIZE))
+
+    pending = asyncio.create_task(asyncio.to_thread(_next_batch))
+    while batch := await pending:
+        pending = asyncio.create_task(asyncio.to_thread(_next_batch))
+        yield batch
+
+
+async def _insert_id_mapped(collection, produce_rows):
+    """Stream (sqlite_id, doc) rows into insert_many batches.
+
+    Returns the sqlite-id -> str(ObjectId) map built from each batch's
+    inserted_ids.
+    """
+    id_map = {}
+    async for batch in _stream_batches(produce_rows):
+        docs = [doc for _, doc in batch]
+        result = await collection.insert_many(docs, ordered=False)
+        for (sqlite_id, _), inserted_id in zip(batch, result.inserted_ids):
+            id_map[sqlite_id] = str(inserted_id)
+        print(f"  Inserted {len(id_map)}...")
+    return id_map
+
+
+async def _insert_children(collection, sessions_collection, field, produce_docs):
+    """Stream child docs into insert_many batches, then push their ids onto
+    the parent sessions. Returns the number of children inserted."""
+    per_session = defaultdict(list)
+    count = 0
+    async for batch in _stream_batches(produce_docs):
+        result = await collection.insert_many(batch, ordered=False)
+        for doc, inserted_id in zip(batch, result.inserted_ids):
+            per_session[doc["session_id"]].append(str(inserted_id))
+        count += len(batch)
+
+    await _push_child_ids(sessions_collection, field, per_session)
+    return count
+
+
+async def _push_child_ids(sessions_collection, field, per_session):
+    """Append child ids to each parent session's array in one bulk_write.
+
+    Grouping per session collapses one $push round-trip per child into a
+    single $each update per session. The filter must use ObjectId: session
+    _id values are ObjectIds, so matching on the string form was a no-op.
+    """
+    if per_session:
+        await sessions_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": ObjectId(session_id)},
+                    {"$push": {field: {"$each": child_ids}}},
+                )
+                for session_id, child_ids in per_session.items()
+            ],
+            ordered=False,
+        )
+
 
 async def migrate_products(mongo_db, sqlite_session):
     """Migrate products and product images."""
     print("Migrating products...")
 
-    products_collection = mongo_db.products
-    products_count = 0
-
-    for product in sqlite_session.query(Product).all():
-        # Convert SQLAlchemy product to MongoDB document
-        product_doc = {
-            "category": "fountain_pens",
-            "schema_version": 2,
-            "source_id": product.source_id,
-            "title": product.title,
-            "handle": product.handle,
-            "vendor": product.vendor,
-            "product_type": product.product_type,
-            "price_min": product.price_min,
-            "price_max": product.price_max,
-            "currency": product.currency,
-            "tags": product.tags(),
-            "options": product.options(),
-            "description": product.description,
-            "url": product.url,
-            "images": [
-                {
-                    "url": img.url,
-                    "alt": img.alt,
-                    "position": img.position,
-                }
-                for img in product.images
-            ],
-        }
-
-        result = await products_collection.insert_one(product_doc)
-        products_count += 1
-        print(f"  Migrated product: {product.title} (id: {result.inserted_id})")
-
-    print(f"Migrated {products_count} products.")
-    # Build map from SQLite product ID to MongoDB ObjectId
-    product_id_map = {}
-    for product in sqlite_session.query(Product).all():
-        mongo_product = await products_collection.find_one({"source_id": product.source_id})
-        if mongo_product:
-            product_id_map[product.id] = str(mongo_product["_id"])
+    def _rows():
+        # yield_per streams rows in windows instead of hydrating the whole
+        # table at once; selectinload pulls each window's images in one
+        # follow-up SELECT instead of a lazy query per product.
+        query = (
+            sqlite_session.query(Product)
+            .options(selectinload(Product.images))
+            .yield_per(1000)
+        )
+        for product in query:
+            yield product.id, {
+                "category": "fountain_pens",
+                "schema_version": 2,
+                "source_id": product.source_id,
+                "title": product.title,
+                "handle": product.handle,
+                "vendor": product.vendor,
+                "product_type": product.product_type,
+                "price_min": product.price_min,
+                "price_max": product.price_max,
+                "currency": product.currency,
+                "tags": product.tags(),
+                "options": product.options(),
+                "description": product.description,
+                "url": product.url,
+                "images": [
+                    {
+                        "url": img.url,
+                        "alt": img.alt,
+                        "position": img.position,
+                    }
+                    for img in product.images
+                ],
+            }
+
+    product_id_map = await _insert_id_mapped(mongo_db.products, _rows)
+    print(f"Migrated {len(product_id_map)} products.")
     return product_id_map
 
 
@@ -74,28 +158,16 @@ async def migrate_users(mongo_db, sqlite_session, product_id_map):
     """Migrate users."""
     print("\nMigrating users...")
 
-    users_collection = mongo_db.users
-    users_count = 0
-
-    for user in sqlite_session.query(User).all():
-        user_doc = {
-            "name": user.name,
-            "created_at": user.created_at,
-            "sessions": [],  # Will be updated after sessions migration
-        }
-
-        result = await users_collection.insert_one(user_doc)
-        users_count += 1
-        print(f"  Migrated user: {user.name} (id: {result.inserted_id})")
-
-    print(f"Migrated {users_count} users.")
-    # Build map from SQLite user ID to MongoDB ObjectId
-    user_id_map = {}
-    for user in sqlite_session.query(User).all():
-        # Find the most recently inserted user with this name
-        mongo_user = await users_collection.find_one({"name": user.name}, sort=[("created_at", -1)])
-        if mongo_user:
-            user_id_map[user.id] = str(mongo_user["_id"])
+    def _rows():
+        for user in sqlite_session.query(User).yield_per(1000):
+            yield user.id, {
+                "name": user.name,
+                "created_at": user.created_at,
+                "sessions": [],  # Will be updated after sessions migration
+            }
+
+    user_id_map = await _insert_id_mapped(mongo_db.users, _rows)
+    print(f"Migrated {len(user_id_map)} users.")
     return user_id_map
 
 
@@ -103,32 +175,18 @@ async def migrate_sessions(mongo_db, sqlite_session, user_id_map):
     """Migrate sessions."""
     print("\nMigrating sessions...")
 
-    sessions_collection = mongo_db.sessions
-    sessions_count = 0
-
-    session_id_map = {}
-
-    for session in sqlite_session.query(UserSession).all():
-        user_id = user_id_map[session.user_id]
-
-        session_doc = {
-            "user_id": user_id,
-            "created_at": session.created_at,
-            "state": {},
-            "selections": [],
-            "prefix_ratings": [],
-        }
-
-        if session.state_json:
-            import json
-            session_doc["state"] = json.loads(session.state_json)
-
-        result = await sessions_collection.insert_one(session_doc)
-        session_id_map[session.id] = str(result.inserted_id)
-        sessions_count += 1
-        print(f"  Migrated session (id: {result.inserted_id})")
-
-    print(f"Migrated {sessions_count} sessions.")
+    def _rows():
+        for session in sqlite_session.query(UserSession).yield_per(1000):
+            yield session.id, {
+                "user_id": user_id_map[session.user_id],
+                "created_at": session.created_at,
+                "state": _loads(session.state_json) if session.state_json else {},
+                "selections": [],
+                "prefix_ratings": [],
+            }
+
+    session_id_map = await _insert_id_mapped(mongo_db.sessions, _rows)
+    print(f"Migrated {len(session_id_map)} sessions.")
     return session_id_map
 
 
@@ -136,59 +194,36 @@ async def migrate_selections(mongo_db, sqlite_session, session_id_map, product_i
     """Migrate selections."""
     print("\nMigrating selections...")
 
-    selections_collection = mongo_db.selections
-    selections_count = 0
-
-    for selection in sqlite_session.query(Selection).all():
-        session_id = session_id_map[selection.session_id]
-        product_id = product_id_map[selection.product_id]
+    def _docs():
+        for selection in sqlite_session.query(Selection).yield_per(1000):
+            yield {
+                "session_id": session_id_map[selection.session_id],
+                "product_id": product_id_map[selection.product_id],
+                "is_exception": selection.is_exception,
+                "created_at": selection.created_at,
+            }
 
-        selection_doc = {
-            "session_id": session_id,
-            "product_id": product_id,
-            "is_exception": selection.is_exception,
-            "created_at": selection.created_at,
-        }
-
-        result = await selections_collection.insert_one(selection_doc)
-        selections_count += 1
-
-        # Add to session's selections array
-        await mongo_db.sessions.update_one(
-            {"_id": session_id},
-            {"$push": {"selections": str(result.inserted_id)}}
-        )
-
-    print(f"Migrated {selections_count} selections.")
+    count = await _insert_children(mongo_db.selections, mongo_db.sessions, "selections", _docs)
+    print(f"Migrated {count} selections.")
 
 
 async def migrate_prefix_ratings(mongo_db, sqlite_session, session_id_map):
     """Migrate prefix ratings."""
     print("\nMigrating prefix ratings...")
 
-    prefix_ratings_collection = mongo_db.prefix_ratings
-    ratings_count = 0
-
-    for rating in sqlite_session.query(PrefixRating).all():
-        session_id = session_id_map[rating.session_id]
+    def _docs():
+        for rating in sqlite_session.query(PrefixRating).yield_per(1000):
+            yield {
+                "session_id": session_id_map[rating.session_id],
+                "rating": rating.rating,
+                "tags": rating.tags(),
+                "created_at": rating.created_at,
+            }
 
-        rating_doc = {
-            "session_id": session_id,
-            "rating": rating.rating,
-            "tags": rating.tags(),
-            "created_at": rating.created_at,
-        }
-
-        result = await prefix_ratings_collection.insert_one(rating_doc)
-        ratings_count += 1
-
-        # Add to session's prefix_ratings array
-        await mongo_db.sessions.update_one(
-            {"_id": session_id},
-            {"$push": {"prefix_ratings": str(result.inserted_id)}}
-        )
-
-    print(f"Migrated {ratings_count} prefix ratings.")
+    count = await _insert_children(
+        mongo_db.prefix_ratings, mongo_db.sessions, "prefix_ratings", _docs
+    )
+    print(f"Migrated {count} prefix ratings.")
 
 
 async def main():
@@ -199,6 +234,13 @@ async def main():
     # Connect to MongoDB
     mongo_client = AsyncIOMotorClient("mongodb://localhost:27017")
     mongo_db = mongo_client["decidio"]
+    # The load itself runs unacknowledged (w=0): this is a one-shot import
+    # with no concurrent readers, so per-batch acks are pure latency.
+    # inserted_ids are client-generated and unaffected. Drops, index builds,
+    # and the final stats go through the acknowledged handle above.
+    load_db = mongo_client.get_database(
+        "decidio", write_concern=WriteConcern(w=0)
+    )
 
     # Clear existing collections (optional - comment out if you want to preserve data)
     print("\nClearing existing MongoDB collections...")
@@ -206,25 +248,42 @@ async def main():
         await mongo_db.drop_collection(collection_name)
         print(f"  Dropped collection: {collection_name}")
 
-    # Create indexes
+    # Only the unique index exists during the load: it enforces correctness
+    # per insert, while the secondary indexes would tax every write and are
+    # cheaper to build in one pass after the data is in place.
     print("\nCreating indexes...")
     await mongo_db.products.create_index("source_id", unique=True)
-    await mongo_db.products.create_index("title")
-    await mongo_db.products.create_index("vendor")
-    await mongo_db.users.create_index("name")
 
     # Connect to SQLite
     sqlite_engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
-    SessionSQLite = sessionmaker(bind=sqlite_engine)
+    # Read-only sessions: the migration never writes to SQLite, so autoflush
+    # checks and post-commit attribute expiry are pure overhead per row.
+    SessionSQLite = sessionmaker(
+        bind=sqlite_engine, autoflush=False, expire_on_commit=False
+    )
     sqlite_session = SessionSQLite()
+    # The gathered migrators below read SQLite from worker threads, so each
+    # task gets its own session; SQLAlchemy sessions are not thread-safe.
+    ratings_sqlite_session = SessionSQLite()
 
     try:
         # Run migrations in order
-        product_id_map = await migrate_products(mongo_db, sqlite_session)
-        user_id_map = await migrate_users(mongo_db, sqlite_session, product_id_map)
-        session_id_map = await migrate_sessions(mongo_db, sqlite_session, user_id_map)
-        await migrate_selections(mongo_db, sqlite_session, session_id_map, product_id_map)
-        await migrate_prefix_ratings(mongo_db, sqlite_session, session_id_map)
+        product_id_map = await migrate_products(load_db, sqlite_session)
+        user_id_map = await migrate_users(load_db, sqlite_session, product_id_map)
+        session_id_map = await migrate_sessions(load_db, sqlite_session, user_id_map)
+        # Selections and prefix ratings write to disjoint collections and
+        # only read the maps built above, so their reads and Mongo
+        # round-trips can overlap.
+        await asyncio.gather(
+            migrate_selections(load_db, sqlite_session, session_id_map, product_id_map),
+            migrate_prefix_ratings(load_db, ratings_sqlite_session, session_id_map),
+        )
+
+        # Build the read-path indexes once the bulk load is done.
+        print("\nCreating secondary indexes...")
+        await mongo_db.products.create_index("title")
+        await mongo_db.products.create_index("vendor")
+        await mongo_db.users.create_index("name")
 
         print("\n" + "="*50)
         print("MIGRATION COMPLETE!")
@@ -250,6 +309,7 @@ async def main():
         traceback.print_exc()
     finally:
         sqlite_session.close()
+        ratings_sqlite_session.close()
         mongo_client.close()
 
 
@@ -1,10 +1,24 @@
+import asyncio
 import csv
 import json
-import time
 from pathlib import Path
 from urllib import robotparser
 
-import requests
+import aiohttp
+
+# Optional fast JSON codec; stdlib json handles the export when orjson is
+# not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional C-vectorized CSV writer; the stdlib csv module handles the export
+# when pandas is not installed.
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 BASE_URL = "https://www.gouletpens.com"
 COLLECTION_URL = f"{BASE_URL}/collections/fountain-pens/products.json"
@@ -21,23 +35,48 @@ def check_robots() -> bool:
     return rp.can_fetch("*", COLLECTION_URL)
 
 
-def fetch_products(limit: int = 250, delay: float = 0.5) -> list[dict]:
-    products = []
-    page = 1
-    while True:
+# Pages are fetched concurrently; the semaphore bounds in-flight requests so
+# the politeness budget is a concurrency cap rather than a per-page sleep.
+FETCH_CONCURRENCY = 6
+
+
+async def _fetch_page(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                      limit: int, page: int) -> list[dict]:
+    async with semaphore:
         params = {"limit": limit, "page": page}
-        resp = requests.get(COLLECTION_URL, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        batch = data.get("products", [])
-        if not batch:
-            break
-        products.extend(batch)
-        page += 1
-        time.sleep(delay)
+        async with session.get(COLLECTION_URL, params=params) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data.get("products", [])
+
+
+async def _fetch_products_async(limit: int) -> list[dict]:
+    products = []
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        page = 1
+        while True:
+            # Fetch a window of pages in parallel; pages are contiguous, so
+            # an empty page means everything past it is empty too.
+            batches = await asyncio.gather(
+                *(
+                    _fetch_page(session, semaphore, limit, p)
+                    for p in range(page, page + FETCH_CONCURRENCY)
+                )
+            )
+            for batch in batches:
+                products.extend(batch)
+            if not all(batches):
+                break
+            page += FETCH_CONCURRENCY
     return products
 
 
+def fetch_products(limit: int = 250) -> list[dict]:
+    return asyncio.run(_fetch_products_async(limit))
+
+
 def normalize_product(raw: dict) -> dict:
     variants = raw.get("variants", [])
     prices = [float(v.get("price", 0)) for v in variants if v.get("price")]
@@ -88,7 +127,10 @@ def main():
     json_path = OUTPUT_DIR / "products.json"
     csv_path = OUTPUT_DIR / "fountain_pens.csv"
 
-    json_path.write_text(json.dumps(normalized, indent=2), encoding="utf-8")
+    if orjson is not None:
+        json_path.write_bytes(orjson.dumps(normalized, option=orjson.OPT_INDENT_2))
+    else:
+        json_path.write_text(json.dumps(normalized, indent=2), encoding="utf-8")
 
     fieldnames = [
         "source_id",
@@ -106,28 +148,26 @@ def main():
         "image_url",
     ]
 
-    with csv_path.open("w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for item in normalized:
-            image_url = item["images"][0]["url"] if item["images"] else ""
-            writer.writerow(
-                {
-                    "source_id": item["source_id"],
-                    "title": item["title"],
-                    "handle": item["handle"],
-                    "vendor": item["vendor"],
-                    "product_type": item["product_type"],
-                    "price_min": item["price_min"],
-                    "price_max": item["price_max"],
-                    "currency": item["currency"],
-                    "tags": json.dumps(item["tags"]),
-                    "options": json.dumps(item["options"]),
-                    "description": item["description"],
-                    "url": item["url"],
-                    "image_url": image_url,
-                }
-            )
+    # Columnar staging: one list per CSV column instead of a dict per row,
+    # which is also the layout pandas ingests without a row-to-column pivot.
+    # A single pass over the products fills every column at once.
+    plain_fields = [n for n in fieldnames if n not in ("tags", "options", "image_url")]
+    columns = {name: [] for name in fieldnames}
+    for item in normalized:
+        for name in plain_fields:
+            columns[name].append(item[name])
+        columns["tags"].append(json.dumps(item["tags"]))
+        columns["options"].append(json.dumps(item["options"]))
+        columns["image_url"].append(item["images"][0]["url"] if item["images"] else "")
+
+    if pd is not None:
+        # One C-vectorized write instead of a writerow call per product.
+        pd.DataFrame(columns)[fieldnames].to_csv(csv_path, index=False)
+    else:
+        with csv_path.open("w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(zip(*(columns[name] for name in fieldnames)))
 
     print(f"Saved {len(normalized)} products to {json_path} and {csv_path}")
 
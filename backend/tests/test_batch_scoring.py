@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from app.ml.prefix_cf import FeatureSpace, PrefixCFModel, decode_state, encode_state
+
+
+PRODUCTS = [
+    {
+        "category": "fountain_pens",
+        "vendor": "Lamy",
+        "product_type": "Fountain Pens",
+        "tags": ["starter"],
+        "options": {"Nib Size": ["Fine"]},
+        "price_min": 25.0,
+        "price_max": 30.0,
+    },
+    {
+        "category": "fountain_pens",
+        "vendor": "Pilot",
+        "product_type": "Fountain Pens",
+        "tags": ["gold nib"],
+        "options": {"Nib Size": ["Medium"]},
+        "price_min": 160.0,
+        "price_max": 200.0,
+    },
+    {
+        "category": "fountain_pens",
+        "vendor": "TWSBI",
+        "product_type": "Fountain Pens",
+        "tags": ["demonstrator"],
+        "options": {"Nib Size": ["Broad"]},
+        "price_min": 50.0,
+        "price_max": 60.0,
+    },
+]
+
+
+class BatchScoringTests(unittest.TestCase):
+    def setUp(self):
+        self.fs = FeatureSpace.build(PRODUCTS)
+        self.model = PrefixCFModel(self.fs)
+
+    def test_vectorize_batch_matches_vectorize(self):
+        matrix = self.fs.vectorize_batch(PRODUCTS)
+        self.assertEqual(matrix.shape, (len(PRODUCTS), len(self.fs.feature_index)))
+        for row, product in enumerate(PRODUCTS):
+            np.testing.assert_allclose(matrix[row], self.fs.vectorize(product))
+
+    def test_score_batch_matches_score_item(self):
+        state = self.model.init_state()
+        self.model.update_with_selection(state, PRODUCTS[0], is_exception=False)
+        matrix = self.fs.vectorize_batch(PRODUCTS)
+        batch_scores = self.model.score_batch(state, matrix)
+        for row, product in enumerate(PRODUCTS):
+            expected = self.model.score_item(state, self.fs.vectorize(product))
+            self.assertAlmostEqual(float(batch_scores[row]), expected, places=5)
+
+    def test_score_batch_cold_state_is_neutral(self):
+        state = self.model.init_state()
+        matrix = self.fs.vectorize_batch(PRODUCTS)
+        scores = self.model.score_batch(state, matrix)
+        np.testing.assert_allclose(scores, 3.0)
+
+    def test_coherence_from_state_matches_pairwise(self):
+        state = self.model.init_state()
+        for product in PRODUCTS:
+            self.model.update_with_selection(state, product, is_exception=False)
+        vecs = [self.fs.vectorize(p) for p in PRODUCTS]
+        expected = self.model.coherence_score(vecs)
+        actual = self.model.coherence_from_state(state)
+        self.assertIsNotNone(actual)
+        self.assertAlmostEqual(actual, expected, places=4)
+
+    def test_coherence_from_state_legacy_state_returns_none(self):
+        state = self.model.init_state()
+        state.pop("history_sum")
+        self.assertIsNone(self.model.coherence_from_state(state))
+
+    def test_state_codec_roundtrip(self):
+        state = self.model.init_state()
+        self.model.update_with_selection(state, PRODUCTS[0], is_exception=False)
+        encoded = encode_state(state)
+        self.assertIn("__np__", encoded["user_vec"])
+        decoded = decode_state(dict(encoded))
+        np.testing.assert_allclose(decoded["user_vec"], state["user_vec"])
+        np.testing.assert_allclose(decoded["history_sum"], state["history_sum"])
+        self.assertEqual(decoded["count"], state["count"])
+
+    def test_decode_state_coerces_legacy_lists(self):
+        legacy = {"user_vec": [0.0, 1.0], "bias": 0.0}
+        decoded = decode_state(legacy)
+        self.assertIsInstance(decoded["user_vec"], np.ndarray)
+        self.assertEqual(decoded["user_vec"].dtype, np.float32)
+
+    def test_coherence_score_matrix_matches_pairwise(self):
+        vecs = [self.fs.vectorize(p) for p in PRODUCTS]
+        expected = self.model.coherence_score(vecs)
+        actual = self.model.coherence_score_matrix(np.stack(vecs))
+        self.assertAlmostEqual(actual, expected, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()